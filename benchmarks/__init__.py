@@ -0,0 +1,12 @@
+"""Offline benchmarks for the hot paths of the pipeline."""
+import os
+import sys
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+
+
+def add_service_path(service):
+    """Make the flat modules of a service importable, as inside its container."""
+    path = os.path.join(SERVICES, service)
+    if path not in sys.path:
+        sys.path.insert(0, path)
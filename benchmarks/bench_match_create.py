@@ -0,0 +1,47 @@
+"""ORM based Match.create and its children.
+
+Run with: python -m pytest benchmarks/bench_match_create.py
+"""
+import asyncio
+
+import pytest
+
+from lol_dto import Match, Player, Runes, Team
+
+
+@pytest.fixture(scope='module')
+def matches(matches_10k):
+    """The first 200 synthetic matches."""
+    return matches_10k[:200]
+
+
+def _run_all(create):
+    """Run an async create function for each of its argument tuples on one event loop."""
+
+    async def run(arguments):
+        return [await create(*argument) for argument in arguments]
+
+    return lambda arguments: asyncio.run(run(arguments))
+
+
+def test_match_create(benchmark, matches):
+    """Match.create including teams, players and runes."""
+    objects = benchmark(_run_all(Match.create), [(match,) for match in matches])
+    assert len(objects[0]) == 73
+
+
+def test_team_create(benchmark, matches):
+    """Team.create for both sides."""
+    benchmark(_run_all(Team.create), [(match, side) for match in matches for side in range(2)])
+
+
+def test_player_create(benchmark, matches):
+    """Player.create for all participants."""
+    benchmark(_run_all(Player.create), [
+        (match, participant_id) for match in matches for participant_id in range(1, 11)])
+
+
+def test_runes_create(benchmark, matches):
+    """Runes.create for all participants."""
+    benchmark(_run_all(Runes.create), [
+        (match, participant_id) for match in matches for participant_id in range(1, 11)])
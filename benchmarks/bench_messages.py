@@ -0,0 +1,43 @@
+"""Encoding and decoding of the messages passed between the services and of API responses.
+
+Run with: python -m pytest benchmarks/bench_messages.py
+"""
+import json
+import pickle
+
+import pytest
+
+STAGES = ('summoner_ids', 'match_history', 'processor_summoner', 'match_details',
+          'processor_match')
+
+
+@pytest.mark.parametrize('stage', STAGES)
+def test_pickle_dumps(benchmark, messages, stage):
+    """Encode the messages sent to a stage."""
+    contents = messages[stage]
+    benchmark(lambda: [pickle.dumps(content) for content in contents])
+
+
+@pytest.mark.parametrize('stage', STAGES)
+def test_pickle_loads(benchmark, messages, stage):
+    """Decode the messages received by a stage."""
+    bodies = [pickle.dumps(content) for content in messages[stage]]
+    assert benchmark(lambda: [pickle.loads(body) for body in bodies]) == messages[stage]
+
+
+def test_json_league_pages(benchmark, league_pages):
+    """Decode league-exp pages as received from the API."""
+    texts = [json.dumps(page) for page in league_pages]
+    benchmark(lambda: [json.loads(text) for text in texts])
+
+
+def test_json_matchlists(benchmark, matchlists):
+    """Decode matchlists as received from the API."""
+    texts = [json.dumps(matchlist) for matchlist in matchlists]
+    benchmark(lambda: [json.loads(text) for text in texts])
+
+
+def test_json_matches(benchmark, matches_10k):
+    """Decode match details as received from the API."""
+    texts = [json.dumps(match) for match in matches_10k[:100]]
+    benchmark(lambda: [json.loads(text) for text in texts])
@@ -0,0 +1,84 @@
+"""Batch building of the processors: collecting messages and turning them into rows.
+
+Run with: python -m pytest benchmarks/bench_processor_batch.py
+"""
+import asyncio
+import pickle
+
+import pytest
+
+from benchmarks import add_service_path
+
+add_service_path('base_image')
+add_service_path('processor_match')
+add_service_path('processor_summoner')
+from batching import collect  # noqa: E402  pylint: disable=C0413
+from match_processor import MatchProcessor  # noqa: E402  pylint: disable=C0413
+from summoner_processor import SummonerProcessor  # noqa: E402  pylint: disable=C0413
+
+
+class Message:
+    """Stand in for an incoming aio_pika message."""
+
+    def __init__(self, body, delivery_tag):
+        self.body = body
+        self.delivery_tag = delivery_tag
+        self.headers = {}
+
+    async def ack(self, multiple=False):
+        pass
+
+    async def nack(self, multiple=False, requeue=True):
+        pass
+
+    async def reject(self, requeue=False):
+        pass
+
+
+class Loader:
+    """Stand in for the summoner loader counting loaded tasks."""
+
+    def __init__(self):
+        self.loaded = 0
+
+    async def load(self, tasks):
+        self.loaded += len(tasks)
+        return len(tasks), 0
+
+
+def _build_batches(processor, bodies, build):
+    """Queue all bodies as messages and build batches until the queue is drained."""
+
+    async def run():
+        messages = asyncio.Queue()
+        for delivery_tag, body in enumerate(bodies):
+            messages.put_nowait(Message(body, delivery_tag))
+        results = []
+        while not messages.empty():
+            results.append(await build(await collect(
+                messages, processor.batch_size, processor.max_linger, lambda: processor.stopped)))
+        return results
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope='module')
+def match_bodies(matches_10k):
+    """500 encoded processor_match messages."""
+    return [pickle.dumps(match) for match in matches_10k[:500]]
+
+
+def test_match_batches(benchmark, match_bodies):
+    """Collect and transform batches of 50 matches in the event loop."""
+    processor = MatchProcessor('EUW1', None)
+    batches = benchmark(_build_batches, processor, match_bodies, processor.transform)
+    assert sum(len(batch) for batch, _ in batches) == 500
+
+
+def test_summoner_batches(benchmark, messages):
+    """Collect, decode and flush batches of summoner."""
+    processor = SummonerProcessor('EUW1', None)
+    processor.loader = Loader()
+    bodies = [pickle.dumps(task) for task in messages['processor_summoner']] * 20
+    benchmark(_build_batches, processor, bodies, processor.flush)
+    assert processor.loader.loaded % 2000 == 0
@@ -0,0 +1,55 @@
+"""Memory added per server to a multi-region stage process, see regions.py.
+
+Run with: python -m pytest benchmarks/bench_regions_memory.py
+"""
+import asyncio
+import gc
+import pickle
+
+from benchmarks import add_service_path, payloads
+
+add_service_path('base_image')
+add_service_path('match_details')
+from logic import Service  # noqa: E402  pylint: disable=C0413
+from regions import Shared  # noqa: E402  pylint: disable=C0413
+
+SERVERS = ['S%s' % index for index in range(11)]
+IN_FLIGHT = 50  # Tasks match_details holds at most, see package_manager
+
+
+def _rss():
+    """Return the resident memory of the process in bytes."""
+    gc.collect()
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def test_match_details_per_server(tmp_path, monkeypatch):
+    """Services, marker connections and a full backlog of match payloads for all servers.
+
+    match_details holds the largest tasks of the stages, the responses of its in flight calls.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'sqlite').mkdir()
+    monkeypatch.setenv('SERVER', ','.join(SERVERS))
+    body = pickle.dumps(payloads.match_payloads(1)[0])
+    shared = Shared('MatchDetails')
+    before = _rss()
+    services = [Service(server, shared) for server in SERVERS]
+
+    async def hold():
+        for service in services:
+            await service.marker.connect()
+            service.rabbit.outstanding_messages = [
+                (pickle.loads(body), {}, 0, '0') for _ in range(IN_FLIGHT)]
+        size = _rss()
+        for service in services:
+            await service.marker.close()
+        return size
+
+    # About 7 MB per server measured, against 150m for each single server stage
+    per_server = (asyncio.run(hold()) - before) / len(SERVERS)
+    assert per_server < 16 * 2 ** 20
@@ -0,0 +1,85 @@
+"""RepeatMarker reads and writes as issued by the services.
+
+Run with: python -m pytest benchmarks/bench_repeat_marker.py
+"""
+import asyncio
+
+import pytest
+
+from benchmarks import add_service_path
+
+add_service_path('base_image')
+from repeat_marker import RepeatMarker  # noqa: E402  pylint: disable=C0413
+
+
+@pytest.fixture
+def loop():
+    """Event loop kept for the lifetime of the markers connection."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def marker(tmp_path, monkeypatch, loop):
+    """Connected RepeatMarker holding the summoner_ids and match_id tables."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('SERVER', 'EUW1')
+    (tmp_path / 'sqlite').mkdir()
+    marker = RepeatMarker()
+    loop.run_until_complete(marker.build(
+        "CREATE TABLE IF NOT EXISTS summoner_ids("
+        "summonerId TEXT PRIMARY KEY,"
+        "accountId TEXT,"
+        "puuid TEXT);"))
+    loop.run_until_complete(marker.connect())
+    loop.run_until_complete(marker.execute_write(
+        "CREATE TABLE IF NOT EXISTS match_id(id BIGINT PRIMARY KEY);"))
+    yield marker
+    loop.run_until_complete(marker.connection.close())
+
+
+def test_summoner_ids_write(benchmark, marker, loop, messages):
+    """REPLACE of resolved summoner ids as done by summoner_ids."""
+    tasks = messages['summoner_ids']
+    accounts = messages['match_history']
+
+    async def write():
+        for (summoner_id, *_), (account_id, puuid, *_) in zip(tasks, accounts):
+            await marker.execute_write(
+                'REPLACE INTO summoner_ids (summonerId, accountId, puuid) '
+                'VALUES ("%s", "%s", "%s");' % (summoner_id, account_id, puuid))
+
+    benchmark(lambda: loop.run_until_complete(write()))
+
+
+def test_summoner_ids_read(benchmark, marker, loop, messages):
+    """Lookup of known summoner ids as done by summoner_ids."""
+    tasks = messages['summoner_ids']
+
+    async def read():
+        found = 0
+        for summoner_id, *_ in tasks:
+            if await marker.execute_read(
+                    'SELECT accountId, puuid FROM summoner_ids WHERE summonerId = "%s";'
+                    % summoner_id):
+                found += 1
+        return found
+
+    loop.run_until_complete(marker.execute_write(
+        'REPLACE INTO summoner_ids (summonerId, accountId, puuid) VALUES %s;' % ", ".join(
+            '("%s", "a", "p")' % summoner_id for summoner_id, *_ in tasks)))
+    assert benchmark(lambda: loop.run_until_complete(read())) == len(tasks)
+
+
+def test_match_id_roundtrip(benchmark, marker, loop, matchlists):
+    """Check and insert of matchIds as done by match_details."""
+    match_ids = [match['gameId'] for match in matchlists[0]['matches']]
+
+    async def roundtrip():
+        for match_id in match_ids:
+            if not await marker.execute_read('SELECT * FROM match_id WHERE id = %s;' % match_id):
+                await marker.execute_write(
+                    'INSERT OR IGNORE INTO match_id (id) VALUES (%s);' % match_id)
+
+    benchmark(lambda: loop.run_until_complete(roundtrip()))
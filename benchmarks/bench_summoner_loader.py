@@ -0,0 +1,101 @@
+"""Summoner upsert benchmarks comparing the COPY merge with the legacy text upsert.
+
+Requires a Postgres database given by BENCHMARK_DSN, e.g.
+BENCHMARK_DSN=postgresql://postgres@localhost/raw python -m pytest benchmarks/bench_summoner_loader.py
+"""
+import asyncio
+import os
+
+import asyncpg
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from benchmarks import add_service_path, payloads
+from lol_dto import HistoryManager, Identifier, IdentifierCache, RankHistory, Summoner
+
+add_service_path('processor_summoner')
+from summoner_loader import SummonerLoader  # noqa: E402  pylint: disable=C0413
+
+DSN = os.environ.get('BENCHMARK_DSN')
+pytestmark = pytest.mark.skipif(not DSN, reason="BENCHMARK_DSN not set.")
+
+
+async def _reset():
+    """Recreate the summoner and identifier tables."""
+    conn = await asyncpg.connect(DSN)
+    for model in (Summoner, Identifier, RankHistory):
+        await conn.execute('DROP TABLE IF EXISTS %s;' % model.__tablename__)
+        await conn.execute(str(CreateTable(model.__table__).compile(dialect=postgresql.dialect())))
+    await conn.close()
+
+
+async def _copy_merge(batches):
+    loader = SummonerLoader(DSN, IdentifierCache(size=100000), HistoryManager())
+    await loader.init()
+    for batch in batches:
+        await loader.load(batch)
+    await loader.close()
+
+
+async def _text_upsert(batches):
+    """Upsert as done before the COPY merge: one formatted statement per batch."""
+    identifiers = IdentifierCache(size=100000)
+    conn = await asyncpg.connect(DSN)
+    for batch in batches:
+        keys = await identifiers.resolve(conn, [key for task in batch for key in task[:2]])
+        values = ",".join(
+            "(%s, %s, %s, %s, %s)" % (keys[task[0]], keys[task[1]], task[2], task[3], task[4])
+            for task in batch)
+        await conn.execute('''
+            INSERT INTO summoner (account_key, puuid_key, rank, wins, losses)
+            VALUES %s
+            ON CONFLICT (puuid_key) DO UPDATE SET account_key = EXCLUDED.account_key,
+            rank = EXCLUDED.rank, wins = EXCLUDED.wins, losses = EXCLUDED.losses;''' % values)
+    await conn.close()
+
+
+@pytest.fixture(scope='module')
+def summoner_batches():
+    """20 batches of 1000 summoner tasks."""
+    tasks = payloads.summoner_tasks(20000)
+    return [tasks[index:index + 1000] for index in range(0, len(tasks), 1000)]
+
+
+def _setup(batches):
+    """Start from tables already holding all summoner, as when rankings are refreshed.
+
+    Resolving previously unseen identifiers dominates the first load, see identifiers.py.
+    """
+    async def prime():
+        await _reset()
+        await _copy_merge(batches)
+
+    asyncio.run(prime())
+
+
+def test_copy_merge_matches_text_upsert(summoner_batches):
+    """Both paths leave the same table content."""
+    query = 'SELECT account_key, puuid_key, rank, wins, losses FROM summoner ORDER BY puuid_key;'
+
+    async def content(method):
+        await _reset()
+        await method(summoner_batches[:5])
+        conn = await asyncpg.connect(DSN)
+        rows = await conn.fetch(query)
+        await conn.close()
+        return [tuple(row) for row in rows]
+
+    assert asyncio.run(content(_copy_merge)) == asyncio.run(content(_text_upsert))
+
+
+def test_copy_merge_20k(benchmark, summoner_batches):
+    """COPY into the staging table and merge."""
+    _setup(summoner_batches)
+    benchmark.pedantic(lambda: asyncio.run(_copy_merge(summoner_batches)), rounds=5)
+
+
+def test_text_upsert_20k(benchmark, summoner_batches):
+    """Legacy formatted multi-row upsert."""
+    _setup(summoner_batches)
+    benchmark.pedantic(lambda: asyncio.run(_text_upsert(summoner_batches)), rounds=5)
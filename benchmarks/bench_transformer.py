@@ -0,0 +1,94 @@
+"""Match payload to row transformation benchmarks.
+
+Run with: python -m pytest benchmarks/bench_transformer.py
+"""
+import asyncio
+import pickle
+import tracemalloc
+
+from lol_dto import Match, MatchTransformer, PlayerRow
+
+
+def _orm_rows(objects, transformer):
+    """Convert ORM instances into row tuples keyed by table name."""
+    rows = {table: [] for table in transformer.tables}
+    for instance in objects:
+        table = instance.__tablename__
+        row = []
+        for column in transformer.columns[table]:
+            value = getattr(instance, column)
+            if column.endswith('Deltas') and value is not None:
+                value = list(value)
+            row.append(value)
+        rows[table].append(tuple(row))
+    return rows
+
+
+def test_transformer_matches_orm(matches_10k):
+    """Rows emitted by the transformer equal those of the ORM create methods."""
+    transformer = MatchTransformer()
+    for match in matches_10k[:20]:
+        rows = transformer.transform(match)
+        keys = {account: key for key, account in enumerate(transformer.account_ids(rows))}
+        expected = _orm_rows(asyncio.run(Match.create(match, keys)), transformer)
+        expected['team'] = [row[:2] + (bool(row[2]),) + row[3:] for row in expected['team']]
+        assert transformer.encode_accounts(rows, keys) == expected
+
+
+def test_transformer_10k(benchmark, matches_10k):
+    """Compiled transformer over 10k matches."""
+    transformer = MatchTransformer()
+    rows = benchmark.pedantic(transformer.transform_many, args=(matches_10k,), rounds=5)
+    assert len(rows['runes']) == 600000
+
+
+def test_orm_create_10k(benchmark, matches_10k):
+    """Legacy ORM based Match.create over 10k matches for comparison."""
+
+    async def create_all():
+        objects = []
+        for match in matches_10k:
+            objects += await Match.create(match)
+        return objects
+
+    objects = benchmark.pedantic(asyncio.run, args=(create_all(),), rounds=1)
+    assert len(objects) == 730000
+
+
+def test_transformer_packed_runes(matches_10k):
+    """Packed runes hold the same values as the runes rows."""
+    rows = MatchTransformer().transform(matches_10k[0])['runes']
+    packed = MatchTransformer(runes_storage='packed').transform(matches_10k[0])['runes_packed']
+    assert len(packed) == 10
+    unpacked = [
+        (match_id, patch, participant_id, position) + values
+        for match_id, patch, participant_id, *arrays in packed
+        for position, values in enumerate(zip(*arrays))]
+    assert unpacked == rows
+
+
+def test_rows_pickle_roundtrip(matches_10k):
+    """Rows keep their row type when passed back from the transform worker processes."""
+    rows = MatchTransformer().transform(matches_10k[0])
+    restored = pickle.loads(pickle.dumps(rows))
+    assert restored == rows
+    assert type(restored['player'][0]) is PlayerRow
+    assert restored['player'][0].participantId == 1
+
+
+def test_rows_memory(matches_10k):
+    """Memory held by the rows of 500 matches compared to the ORM instances."""
+
+    def allocated(create):
+        tracemalloc.start()
+        result = create()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        return size
+
+    transformer = MatchTransformer()
+    matches = matches_10k[:500]
+    rows = allocated(lambda: transformer.transform_many(matches))
+    orm = allocated(lambda: [asyncio.run(Match.create(match)) for match in matches])
+    assert rows < orm
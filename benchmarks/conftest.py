@@ -0,0 +1,28 @@
+"""Shared fixtures for the benchmark modules."""
+import pytest
+
+from benchmarks import payloads
+
+
+@pytest.fixture(scope='session')
+def matches_10k():
+    """10000 synthetic Match-V4 payloads."""
+    return payloads.match_payloads(10000)
+
+
+@pytest.fixture(scope='session')
+def league_pages():
+    """Ten full league-exp-V4 pages."""
+    return [payloads.league_page(page=page) for page in range(1, 11)]
+
+
+@pytest.fixture(scope='session')
+def matchlists():
+    """100 Match-V4 matchlists."""
+    return [payloads.matchlist('account%s' % index) for index in range(100)]
+
+
+@pytest.fixture(scope='session')
+def messages():
+    """100 message contents per receiving stage."""
+    return payloads.messages()
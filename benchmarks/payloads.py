@@ -0,0 +1,204 @@
+"""Synthetic Riot API payloads resembling the production responses.
+
+Payloads are generated from a seeded random source so runs are comparable across commits.
+"""
+import random
+
+STAT_KEYS = (
+    'kills', 'deaths', 'assists', 'largestKillingSpree', 'largestMultiKill', 'killingSprees',
+    'longestTimeSpentLiving', 'doubleKills', 'tripleKills', 'quadraKills', 'pentaKills',
+    'unrealKills', 'totalDamageDealt', 'magicDamageDealt', 'physicalDamageDealt',
+    'trueDamageDealt', 'largestCriticalStrike', 'totalDamageDealtToChampions',
+    'magicDamageDealtToChampions', 'physicalDamageDealtToChampions',
+    'trueDamageDealtToChampions', 'totalHeal', 'totalUnitsHealed', 'damageSelfMitigated',
+    'damageDealtToObjectives', 'damageDealtToTurrets', 'visionScore', 'timeCCingOthers',
+    'totalDamageTaken', 'magicalDamageTaken', 'physicalDamageTaken', 'trueDamageTaken',
+    'goldEarned', 'goldSpent', 'turretKills', 'inhibitorKills', 'totalMinionsKilled',
+    'neutralMinionsKilled', 'neutralMinionsKilledTeamJungle',
+    'neutralMinionsKilledEnemyJungle', 'totalTimeCrowdControlDealt', 'champLevel',
+    'visionWardsBoughtInGame', 'sightWardsBoughtInGame', 'wardsPlaced', 'wardsKilled',
+    'combatPlayerScore', 'objectivePlayerScore', 'totalPlayerScore', 'totalScoreRank',
+    'playerScore0', 'playerScore1', 'playerScore2', 'playerScore3', 'playerScore4',
+    'playerScore5', 'playerScore6', 'playerScore7', 'playerScore8', 'playerScore9',
+    'perkPrimaryStyle', 'perkSubStyle')
+
+STAT_FLAGS = (
+    'win', 'firstBloodKill', 'firstBloodAssist', 'firstTowerKill', 'firstTowerAssist',
+    'firstInhibitorKill', 'firstInhibitorAssist')
+
+DELTA_KEYS = (
+    'creepsPerMinDeltas', 'xpPerMinDeltas', 'goldPerMinDeltas', 'csDiffPerMinDeltas',
+    'xpDiffPerMinDeltas', 'damageTakenPerMinDeltas', 'damageTakenDiffPerMinDeltas')
+
+TIERS = ('IRON', 'BRONZE', 'SILVER', 'GOLD', 'PLATINUM', 'DIAMOND')
+DIVISIONS = ('IV', 'III', 'II', 'I')
+
+
+def _encrypted_id(rand, length):
+    """Return a random string resembling an encrypted summoner/account id."""
+    return ''.join(rand.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_')
+                   for _ in range(length))
+
+
+def match_payload(game_id, rand=None):
+    """Return a Match-V4 match details payload."""
+    rand = rand or random.Random(game_id)
+    duration = rand.randint(900, 2700)
+    participants = []
+    identities = []
+    for index in range(10):
+        participant_id = index + 1
+        stats = {'participantId': participant_id}
+        for key in STAT_KEYS:
+            stats[key] = rand.randint(0, 30000)
+        for key in STAT_FLAGS:
+            stats[key] = rand.random() < 0.2
+        for item in range(7):
+            stats['item%s' % item] = rand.choice((0, 1055, 3006, 3031, 3046, 3072, 3094, 6673))
+        for perk in range(6):
+            stats['perk%s' % perk] = rand.randint(8000, 8500)
+            for var in range(1, 4):
+                stats['perk%sVar%s' % (perk, var)] = rand.randint(0, 3000)
+        for perk in range(3):
+            stats['statPerk%s' % perk] = rand.choice((5001, 5002, 5003, 5005, 5007, 5008))
+        timeline = {
+            'participantId': participant_id,
+            'role': 'SOLO',
+            'lane': 'TOP',
+        }
+        for key in DELTA_KEYS:
+            timeline[key] = {
+                '0-10': round(rand.uniform(-5, 600), 1),
+                '10-20': round(rand.uniform(-5, 600), 1),
+                '20-30': round(rand.uniform(-5, 600), 1),
+            }
+        participants.append({
+            'participantId': participant_id,
+            'teamId': 100 if participant_id <= 5 else 200,
+            'championId': rand.randint(1, 876),
+            'spell1Id': rand.choice((4, 14)),
+            'spell2Id': rand.choice((3, 7, 11, 12)),
+            'stats': stats,
+            'timeline': timeline,
+        })
+        identities.append({
+            'participantId': participant_id,
+            'player': {
+                'platformId': 'EUW1',
+                'accountId': _encrypted_id(rand, 56),
+                'summonerName': 'Summoner%s' % rand.randint(0, 10 ** 6),
+                'summonerId': _encrypted_id(rand, 47),
+                'currentPlatformId': 'EUW1',
+                'currentAccountId': _encrypted_id(rand, 56),
+                'matchHistoryUri': '/v1/stats/player_history/EUW1/%s' % rand.randint(0, 10 ** 9),
+                'profileIcon': rand.randint(0, 4500),
+            }
+        })
+    blue_win = rand.random() < 0.5
+    teams = []
+    for side, team_id in enumerate((100, 200)):
+        teams.append({
+            'teamId': team_id,
+            'win': 'Win' if blue_win == (side == 0) else 'Fail',
+            'firstBlood': rand.random() < 0.5,
+            'firstTower': rand.random() < 0.5,
+            'firstInhibitor': rand.random() < 0.5,
+            'firstBaron': rand.random() < 0.5,
+            'firstDragon': rand.random() < 0.5,
+            'firstRiftHerald': rand.random() < 0.5,
+            'towerKills': rand.randint(0, 11),
+            'inhibitorKills': rand.randint(0, 3),
+            'baronKills': rand.randint(0, 2),
+            'dragonKills': rand.randint(0, 5),
+            'vilemawKills': 0,
+            'riftHeraldKills': rand.randint(0, 2),
+            'dominionVictoryScore': 0,
+            'bans': [{'championId': rand.randint(1, 876), 'pickTurn': turn + 1 + side * 5}
+                     for turn in range(5)],
+        })
+    return {
+        'gameId': game_id,
+        'platformId': 'EUW1',
+        'gameCreation': 1595401200000 + game_id % 10 ** 7 * 1000,
+        'gameDuration': duration,
+        'queueId': 420,
+        'mapId': 11,
+        'seasonId': 13,
+        'gameVersion': '10.%s.330.9186' % (15 + game_id % 3),
+        'gameMode': 'CLASSIC',
+        'gameType': 'MATCHED_GAME',
+        'teams': teams,
+        'participants': participants,
+        'participantIdentities': identities,
+    }
+
+
+def match_payloads(count, first_id=4700000000):
+    """Return a list of `count` match payloads with consecutive game ids."""
+    return [match_payload(game_id) for game_id in range(first_id, first_id + count)]
+
+
+def summoner_tasks(count, seed=0):
+    """Return `count` summoner processor tasks [accountId, puuid, rank, wins, losses]."""
+    rand = random.Random(seed)
+    return [[_encrypted_id(rand, 56), _encrypted_id(rand, 78), rand.randint(0, 2800),
+             rand.randint(0, 500), rand.randint(0, 500)] for _ in range(count)]
+
+
+def league_page(tier='GOLD', division='II', page=1, size=205):
+    """Return a league-exp-V4 entries page of `size` entries."""
+    rand = random.Random('%s%s%s' % (tier, division, page))
+    entries = []
+    for _ in range(size):
+        wins = rand.randint(0, 400)
+        entries.append({
+            'leagueId': '8f6a3b5e-%s' % _encrypted_id(rand, 27),
+            'queueType': 'RANKED_SOLO_5x5',
+            'tier': tier,
+            'rank': division,
+            'summonerId': _encrypted_id(rand, 47),
+            'summonerName': _encrypted_id(rand, 12),
+            'leaguePoints': rand.randint(0, 99),
+            'wins': wins,
+            'losses': rand.randint(max(0, wins - 40), wins + 40),
+            'veteran': rand.random() < 0.1,
+            'inactive': False,
+            'freshBlood': rand.random() < 0.1,
+            'hotStreak': rand.random() < 0.1,
+        })
+    return entries
+
+
+def matchlist(account_id, first_id=4700000000, size=100):
+    """Return a Match-V4 matchlist payload of `size` matches."""
+    rand = random.Random(account_id)
+    game_ids = sorted(rand.sample(range(first_id, first_id + 100 * size), size), reverse=True)
+    return {
+        'matches': [{
+            'platformId': 'EUW1',
+            'gameId': game_id,
+            'champion': rand.randint(1, 875),
+            'queue': 420,
+            'season': 13,
+            'timestamp': 1600000000000 + (game_id - first_id) * 1000,
+            'role': rand.choice(('SOLO', 'DUO', 'DUO_CARRY', 'DUO_SUPPORT', 'NONE')),
+            'lane': rand.choice(('TOP', 'JUNGLE', 'MID', 'BOTTOM', 'NONE')),
+        } for game_id in game_ids],
+        'startIndex': 0,
+        'endIndex': size,
+        'totalGames': size,
+    }
+
+
+def messages(count=100):
+    """Return message contents as sent between the services, keyed by the receiving stage."""
+    rand = random.Random(count)
+    summoner = summoner_tasks(count)
+    return {
+        'summoner_ids': [[_encrypted_id(rand, 47), rank, wins, losses]
+                         for _, _, rank, wins, losses in summoner],
+        'match_history': summoner,
+        'processor_summoner': summoner,
+        'match_details': [4700000000 + index for index in range(count)],
+        'processor_match': match_payloads(count),
+    }
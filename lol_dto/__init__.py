@@ -1,5 +1,15 @@
 from .base import Base
-from .player import Player, Runes
+from .player import Player, Runes, PackedRunes
 from .team import Team
 from .match import Match
-from .summoner import Summoner
\ No newline at end of file
+from .summoner import Summoner
+from .identifiers import Identifier, IdentifierCache
+from .transformer import MatchTransformer
+from .partitions import PartitionManager
+from .patch import patch_from_version
+from .runes import create_unpacked_view, migrate_runes
+from .migrations import migrate, migrate_partitioning, rename_unpartitioned
+from .aggregates import Aggregator, ChampionStats, ItemStats, BanStats
+from .rank_history import RankHistory, Downsampled, HistoryManager
+from .rows import MatchRow, TeamRow, PlayerRow, RunesRow, PackedRunesRow
+from .traces import TraceLatency
@@ -0,0 +1,189 @@
+"""Aggregate tables maintained incrementally on ingest.
+
+Per patch and queue the tables hold summed player results per champion, item usage and
+bans. The processor upserts the aggregates of the matches a batch inserted within the batch
+transaction.
+`rebuild` recomputes them from the raw tables.
+
+Player wins are derived from the match: `match.win` is set if the first team (blue side)
+won while `player.team` is set for the red side.
+"""
+from sqlalchemy import Column, BigInteger, SmallInteger
+
+from .base import Base
+
+
+class ChampionStats(Base):
+    """Results summed per champion."""
+
+    __tablename__ = 'champion_stats'
+
+    patch = Column(SmallInteger, primary_key=True)
+    queue = Column(SmallInteger, primary_key=True)
+    championId = Column(SmallInteger, primary_key=True)
+
+    games = Column(BigInteger)
+    wins = Column(BigInteger)
+    kills = Column(BigInteger)
+    deaths = Column(BigInteger)
+    assists = Column(BigInteger)
+
+
+class ItemStats(Base):
+    """Games finished with an item in the inventory."""
+
+    __tablename__ = 'item_stats'
+
+    patch = Column(SmallInteger, primary_key=True)
+    queue = Column(SmallInteger, primary_key=True)
+    itemId = Column(SmallInteger, primary_key=True)
+
+    games = Column(BigInteger)
+    wins = Column(BigInteger)
+
+
+class BanStats(Base):
+    """Bans per champion."""
+
+    __tablename__ = 'ban_stats'
+
+    patch = Column(SmallInteger, primary_key=True)
+    queue = Column(SmallInteger, primary_key=True)
+    championId = Column(SmallInteger, primary_key=True)
+
+    bans = Column(BigInteger)
+
+
+AGGREGATE_MODELS = (ChampionStats, ItemStats, BanStats)
+
+REBUILD_QUERIES = (
+    '''
+    INSERT INTO champion_stats (patch, queue, "championId", games, wins, kills, deaths, assists)
+    SELECT m.patch, m.queue, p."championId",
+           count(*), count(*) FILTER (WHERE p.team <> m.win),
+           coalesce(sum(p.kills), 0), coalesce(sum(p.deaths), 0), coalesce(sum(p.assists), 0)
+    FROM player p
+    JOIN match m ON m."matchId" = p."matchId" AND m.patch = p.patch
+    WHERE $1::SMALLINT IS NULL OR m.patch = $1
+    GROUP BY m.patch, m.queue, p."championId";
+    ''',
+    '''
+    INSERT INTO item_stats (patch, queue, "itemId", games, wins)
+    SELECT m.patch, m.queue, item.id, count(*), count(*) FILTER (WHERE p.team <> m.win)
+    FROM player p
+    JOIN match m ON m."matchId" = p."matchId" AND m.patch = p.patch
+    CROSS JOIN LATERAL (SELECT DISTINCT unnest(p.items) AS id) item
+    WHERE ($1::SMALLINT IS NULL OR m.patch = $1) AND item.id <> 0
+    GROUP BY m.patch, m.queue, item.id;
+    ''',
+    '''
+    INSERT INTO ban_stats (patch, queue, "championId", bans)
+    SELECT m.patch, m.queue, (ban ->> 'championId')::SMALLINT, count(*)
+    FROM team t
+    JOIN match m ON m."matchId" = t."matchId" AND m.patch = t.patch
+    CROSS JOIN LATERAL json_array_elements(t.bans) ban
+    WHERE ($1::SMALLINT IS NULL OR m.patch = $1) AND (ban ->> 'championId')::INTEGER > 0
+    GROUP BY m.patch, m.queue, (ban ->> 'championId')::SMALLINT;
+    ''',
+)
+
+
+def _upsert_query(model):
+    """Return the statement adding a row of values onto the existing aggregate."""
+    table = model.__table__
+    keys = [column.name for column in table.primary_key.columns]
+    values = [column.name for column in table.columns if not column.primary_key]
+    columns = keys + values
+    return 'INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (%s) DO UPDATE SET %s;' % (
+        table.name,
+        ", ".join('"%s"' % column for column in columns),
+        ", ".join('$%s' % (index + 1) for index in range(len(columns))),
+        ", ".join('"%s"' % column for column in keys),
+        ", ".join('"%s" = %s."%s" + EXCLUDED."%s"' % (column, table.name, column, column)
+                  for column in values))
+
+
+class Aggregator:
+    """Build and upsert the aggregates of transformed rows."""
+
+    def __init__(self, transformer):
+        """Resolve the position of all required fields in the transformer rows."""
+        columns = transformer.columns
+        self.match_fields = tuple(
+            columns['match'].index(name) for name in ('matchId', 'patch', 'queue', 'win'))
+        self.player_fields = tuple(
+            columns['player'].index(name) for name in (
+                'matchId', 'team', 'championId', 'kills', 'deaths', 'assists', 'items'))
+        self.team_fields = tuple(columns['team'].index(name) for name in ('matchId', 'bans'))
+        self.queries = {model.__tablename__: _upsert_query(model) for model in AGGREGATE_MODELS}
+
+    def aggregate(self, rows):
+        """Return the aggregate rows of a batch keyed by table name.
+
+        Rows are sorted by key so concurrent upserts lock rows in the same order.
+        """
+        match_id, patch, queue, win = self.match_fields
+        matches = {row[match_id]: (row[patch], row[queue], row[win]) for row in rows['match']}
+
+        champions = {}
+        items = {}
+        match_id, team, champion, kills, deaths, assists, inventory = self.player_fields
+        for row in rows['player']:
+            patch, queue, blue_win = matches[row[match_id]]
+            won = int(row[team] != blue_win)
+            key = (patch, queue, row[champion])
+            entry = champions.get(key)
+            if entry is None:
+                entry = champions[key] = [0, 0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += won
+            entry[2] += row[kills] or 0
+            entry[3] += row[deaths] or 0
+            entry[4] += row[assists] or 0
+            for item in set(row[inventory] or ()):
+                if not item:
+                    continue
+                key = (patch, queue, item)
+                entry = items.get(key)
+                if entry is None:
+                    entry = items[key] = [0, 0]
+                entry[0] += 1
+                entry[1] += won
+
+        bans = {}
+        match_id, team_bans = self.team_fields
+        for row in rows['team']:
+            patch, queue, _ = matches[row[match_id]]
+            for ban in row[team_bans] or ():
+                if ban['championId'] > 0:
+                    key = (patch, queue, ban['championId'])
+                    bans[key] = bans.get(key, 0) + 1
+
+        return {
+            'champion_stats': [key + tuple(value) for key, value in sorted(champions.items())],
+            'item_stats': [key + tuple(value) for key, value in sorted(items.items())],
+            'ban_stats': [key + (value,) for key, value in sorted(bans.items())],
+        }
+
+    async def upsert(self, conn, rows):
+        """Add the aggregates of a batch of transformed rows to the aggregate tables."""
+        for table, aggregate_rows in self.aggregate(rows).items():
+            if aggregate_rows:
+                await conn.executemany(self.queries[table], aggregate_rows)
+
+
+async def rebuild(conn, patch=None):
+    """Recompute the aggregate tables from the raw tables.
+
+    ::param patch: Only rebuild the aggregates of a single patch.
+    """
+    tables = ", ".join(model.__tablename__ for model in AGGREGATE_MODELS)
+    async with conn.transaction():
+        # Blocks incremental upserts until the rebuild is committed
+        await conn.execute('LOCK TABLE %s IN EXCLUSIVE MODE;' % tables)
+        for model in AGGREGATE_MODELS:
+            await conn.execute(
+                'DELETE FROM %s WHERE $1::SMALLINT IS NULL OR patch = $1;' % model.__tablename__,
+                patch)
+        for query in REBUILD_QUERIES:
+            await conn.execute(query, patch)
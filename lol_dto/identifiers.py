@@ -0,0 +1,77 @@
+"""Dictionary encoding of account ids and puuids into BIGINT surrogate keys.
+
+Encrypted ids are stored once in the identifier table. player and summoner only reference
+them by their integer key. Account ids and puuids differ in length and cannot collide, which
+is why both share one table.
+"""
+from collections import OrderedDict
+
+from sqlalchemy import Column, BigInteger, String
+
+from .base import Base
+
+
+class Identifier(Base):
+    """Mapping of encrypted ids to surrogate keys."""
+
+    __tablename__ = 'identifier'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    value = Column(String(78), unique=True, nullable=False)
+
+
+class IdentifierCache:
+    """In process LRU cache in front of the identifier table."""
+
+    select_query = 'SELECT value, id FROM identifier WHERE value = ANY($1::VARCHAR[]);'
+    insert_query = ('INSERT INTO identifier (value) SELECT unnest($1::VARCHAR[]) '
+                    'ON CONFLICT DO NOTHING RETURNING value, id;')
+
+    def __init__(self, size=100000):
+        """Set cache size.
+
+        ::param size: Maximum number of ids kept in memory.
+        """
+        self.size = size
+        self.keys = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, rows):
+        for value, key in rows:
+            self.keys[value] = key
+        while len(self.keys) > self.size:
+            self.keys.popitem(last=False)
+
+    async def resolve(self, conn, values):
+        """Return a dict mapping each of the values to its surrogate key.
+
+        Unknown values are added to the identifier table. Runs outside of any transaction
+        of the caller's batch to keep locks on the identifier table short.
+        """
+        resolved = {}
+        missing = []
+        keys = self.keys
+        for value in set(values):
+            if value in keys:
+                keys.move_to_end(value)
+                resolved[value] = keys[value]
+            else:
+                missing.append(value)
+        self.hits += len(resolved)
+        self.misses += len(missing)
+        if not missing:
+            return resolved
+        rows = [tuple(row) for row in await conn.fetch(self.select_query, missing)]
+        if len(rows) < len(missing):
+            found = {row[0] for row in rows}
+            new = [value for value in missing if value not in found]
+            rows += [tuple(row) for row in await conn.fetch(self.insert_query, new)]
+            if len(rows) < len(missing):
+                # Inserted concurrently by another processor
+                found = {row[0] for row in rows}
+                rows += [tuple(row) for row in await conn.fetch(
+                    self.select_query, [value for value in new if value not in found])]
+        self._remember(rows)
+        resolved.update(rows)
+        return resolved
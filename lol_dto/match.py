@@ -1,8 +1,10 @@
 """Tables related to Match Data."""
-from sqlalchemy import Column, Enum, Integer, Boolean, String, BigInteger, TIMESTAMP, SmallInteger, VARCHAR
+from sqlalchemy import Column, Enum, Integer, Boolean, String, BigInteger, TIMESTAMP, SmallInteger, VARCHAR, \
+    DateTime, func
 from . import Base, Team, Player, Runes
 import asyncio
 from .enums import Server
+from .patch import patch_from_version
 from sqlalchemy.orm import relationship
 
 
@@ -12,29 +14,41 @@ class Match(Base):
     Aims to resemble the LongtermStructure format.
     """
     __tablename__ = 'match'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (patch)'}
 
     matchId = Column(BigInteger, primary_key=True)
+    patch = Column(SmallInteger, primary_key=True)  # Derived from gameVersion, e.g. 1016
 
     start = Column(BigInteger)
     duration = Column(SmallInteger)
     gameVersion = Column(String)
+    queue = Column(SmallInteger)
 
     win = Column(Boolean)  # False: Blue | True: Red
 
+    # Start of the inserting transaction, orders the incremental exports (see exporter)
+    ingested = Column(DateTime(timezone=True), server_default=func.now())
+
     @classmethod
-    async def create(cls, match):
-        """Create the match object as well as sub elements"""
+    async def create(cls, match, keys=None):
+        """Create the match object as well as sub elements.
+
+        The processors use MatchTransformer and the row types of rows.py instead.
+        ::param keys: Mapping of account ids to their surrogate keys, see Player.create.
+        """
         matchObject = cls(
             start=match['gameCreation'] // 1000,
             duration=match['gameDuration'],
             gameVersion=match['gameVersion'],
+            queue=match.get('queueId'),
             matchId=match['gameId'],
+            patch=patch_from_version(match['gameVersion']),
         )
         matchObject.win = match['teams'][0]['win'] == 'Win'
         objects = [matchObject]
 
         objects += [await Team.create(match, 0), await Team.create(match, 1)] + await asyncio.gather(*[
-            asyncio.create_task(Player.create(match, i)) for i in range(1, 11)
+            asyncio.create_task(Player.create(match, i, keys)) for i in range(1, 11)
         ])
         for entry in await asyncio.gather(*[
             asyncio.create_task(Runes.create(match, i)) for i in range(1, 11)
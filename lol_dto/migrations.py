@@ -0,0 +1,149 @@
+"""Migration of existing databases to the current schema.
+
+`create_all` only creates missing tables, changes to existing tables are applied here. All
+statements can be run repeatedly, processor_match migrates on every start.
+
+Tables created before partitioning can not be altered into partitioned tables. They are renamed
+and copied into the partitioned tables by migrate_partitions.py instead.
+"""
+from .partitions import LOCK_ID, PARTITIONED_TABLES
+
+STATEMENTS = (
+    # Only ranked solo matches (queue 420) were pulled before the queue was stored
+    '''
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'match' AND column_name = 'queue') THEN
+            ALTER TABLE match ADD COLUMN queue SMALLINT;
+            UPDATE match SET queue = 420;
+        END IF;
+    END $$;
+    ''',
+    # Existing matches are set to the time of the migration
+    'ALTER TABLE match ADD COLUMN IF NOT EXISTS ingested TIMESTAMPTZ DEFAULT now();',
+    # Encrypted ids were stored inline before the identifier table, see identifiers.py
+    '''
+    DO $$ BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'player' AND column_name = 'accountId') THEN
+            INSERT INTO identifier (value) SELECT DISTINCT "accountId" FROM player
+                WHERE "accountId" IS NOT NULL ON CONFLICT DO NOTHING;
+            ALTER TABLE player ADD COLUMN IF NOT EXISTS "accountKey" BIGINT;
+            UPDATE player SET "accountKey" = identifier.id FROM identifier
+                WHERE identifier.value = player."accountId";
+            ALTER TABLE player DROP COLUMN "accountId";
+        END IF;
+    END $$;
+    ''',
+    '''
+    DO $$ BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'summoner' AND column_name = 'puuid') THEN
+            INSERT INTO identifier (value)
+                SELECT puuid FROM summoner UNION
+                SELECT account_id FROM summoner WHERE account_id IS NOT NULL
+                ON CONFLICT DO NOTHING;
+            ALTER TABLE summoner ADD COLUMN IF NOT EXISTS puuid_key BIGINT,
+                ADD COLUMN IF NOT EXISTS account_key BIGINT;
+            UPDATE summoner SET
+                puuid_key = (SELECT id FROM identifier WHERE value = summoner.puuid),
+                account_key = (SELECT id FROM identifier WHERE value = summoner.account_id);
+            ALTER TABLE summoner DROP COLUMN puuid, DROP COLUMN account_id;
+            ALTER TABLE summoner ADD PRIMARY KEY (puuid_key);
+        END IF;
+    END $$;
+    ''',
+)
+
+UNPARTITIONED = ("SELECT relname FROM pg_class WHERE relname = ANY($1::TEXT[]) "
+                 "AND relkind = 'r' AND NOT relispartition;")
+COLUMNS = ('SELECT column_name FROM information_schema.columns WHERE table_name = $1 '
+           'ORDER BY ordinal_position;')
+# SQL equivalent of patch_from_version on the gameVersion of the old match table
+LEGACY_PATCH = ("split_part(legacy_match.\"gameVersion\", '.', 1)::INT * 100 + "
+                "split_part(legacy_match.\"gameVersion\", '.', 2)::INT")
+
+
+async def migrate(conn, partitions):
+    """Apply the migrations and create missing indexes on the attached partitions.
+
+    ::param partitions: PartitionManager of the match tables.
+    :raises RuntimeError: if the match tables were created before partitioning.
+    """
+    # create_all leaves tables created before partitioning in place, inserts would fail
+    if unpartitioned := [row[0] for row in await conn.fetch(
+            UNPARTITIONED, list(PARTITIONED_TABLES))]:
+        raise RuntimeError(
+            "Tables %s were created before partitioning, run python migrate_partitions.py."
+            % ", ".join(unpartitioned))
+    async with conn.transaction():
+        await conn.execute('SELECT pg_advisory_xact_lock(%s);' % LOCK_ID)
+        for statement in STATEMENTS:
+            await conn.execute(statement)
+        for patch in await partitions.attached(conn, 'match'):
+            for statement in partitions.create_statements(patch):
+                await conn.execute(statement)
+
+
+async def rename_unpartitioned(conn):
+    """Rename the tables created before partitioning and their indexes to <name>_unpartitioned.
+
+    Frees the names for the partitioned tables, has to run before create_all.
+    :returns: List of the renamed tables.
+    """
+    tables = [row[0] for row in await conn.fetch(UNPARTITIONED, list(PARTITIONED_TABLES))]
+    async with conn.transaction():
+        for table in tables:
+            for (index,) in await conn.fetch(
+                    'SELECT indexrelid::regclass::TEXT FROM pg_index WHERE indrelid = $1::regclass;',
+                    table):
+                await conn.execute('ALTER INDEX %s RENAME TO "%s_unpartitioned";' % (
+                    index, index.strip('"')))
+            await conn.execute('ALTER TABLE %s RENAME TO %s_unpartitioned;' % (table, table))
+    return tables
+
+
+async def migrate_partitioning(conn, partitions, drop=False):
+    """Copy the content of the renamed tables into the partitioned tables.
+
+    The patch of each row is derived from the gameVersion of its match. Rows are inserted with
+    ON CONFLICT DO NOTHING, an interrupted migration can be run again.
+    ::param conn: asyncpg connection.
+    ::param partitions: PartitionManager used to create the partitions.
+    ::param drop: Drop the renamed tables once all of them are copied.
+
+    :returns: Dict of copied rows per table.
+    """
+    copied = {}
+    if not await conn.fetch(COLUMNS, 'match_unpartitioned'):
+        return copied
+    patches = {row[0] for row in await conn.fetch(
+        'SELECT DISTINCT %s FROM match_unpartitioned legacy_match;' % LEGACY_PATCH)}
+    expired = list(await partitions.ensure(conn, patches))
+    for table in PARTITIONED_TABLES:
+        legacy = '%s_unpartitioned' % table
+        if not (legacy_columns := [row[0] for row in await conn.fetch(COLUMNS, legacy)]):
+            continue
+        columns = {row[0] for row in await conn.fetch(COLUMNS, table)}
+        selects = {column: 'legacy."%s"' % column for column in legacy_columns if column in columns}
+        selects['patch'] = LEGACY_PATCH
+        if table == 'match' and 'queue' not in legacy_columns:
+            selects['queue'] = '420'  # Only ranked solo matches were pulled
+        async with conn.transaction():
+            if table == 'player' and 'accountId' in legacy_columns:
+                await conn.execute(
+                    'INSERT INTO identifier (value) SELECT DISTINCT "accountId" FROM %s '
+                    'WHERE "accountId" IS NOT NULL ON CONFLICT DO NOTHING;' % legacy)
+                selects['accountKey'] = (
+                    '(SELECT id FROM identifier WHERE value = legacy."accountId")')
+            status = await conn.execute(
+                'INSERT INTO %s (%s) SELECT %s FROM %s legacy '
+                'JOIN match_unpartitioned legacy_match ON legacy_match."matchId" = legacy."matchId" '
+                'WHERE NOT %s = ANY($1::INT[]) ON CONFLICT DO NOTHING;' % (
+                    table, ", ".join('"%s"' % column for column in selects),
+                    ", ".join(selects.values()), legacy, LEGACY_PATCH), expired)
+            copied[table] = int(status.rsplit(' ', 1)[1])
+    if drop:
+        for table in reversed(PARTITIONED_TABLES):
+            await conn.execute('DROP TABLE IF EXISTS %s_unpartitioned;' % table)
+    return copied
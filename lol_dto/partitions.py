@@ -0,0 +1,124 @@
+"""Partition management for the match related tables.
+
+match, team, player, runes and runes_packed are range partitioned by patch (see patch.py).
+Partitions are created the first time data of a patch is inserted. Secondary indexes live
+on the partitions only, so their size is bound by a single patch instead of the whole
+dataset, and queries filtering on a patch only touch one partition.
+
+With a retention set, partitions beyond the newest `retention` patches are detached.
+Detached partitions stay available as plain tables named <table>_<patch>.
+"""
+
+PARTITIONED_TABLES = ('match', 'team', 'player', 'runes', 'runes_packed')
+
+# Secondary indexes created on each new partition
+PARTITION_INDEXES = {
+    'match': (('start', 'USING BRIN ("start")'), ('ingested', 'USING BRIN ("ingested")')),
+    'player': (('accountKey', '("accountKey")'), ('championId', '("championId")')),
+}
+
+LOCK_ID = 7316  # Advisory lock serializing partition changes across processors
+
+
+class PartitionManager:
+    """Create and detach patch partitions on demand."""
+
+    def __init__(self, retention=0):
+        """Set retention.
+
+        ::param retention: Number of most recent patches kept attached. 0 keeps all.
+        """
+        self.retention = retention
+        self.known = set()  # Attached patches as last read, see refresh
+        self.oldest = None  # Oldest retained patch if partitions have been detached
+
+    @staticmethod
+    def partition_name(table, patch):
+        """Return the partition table name of a patch."""
+        return '%s_%s' % (table, patch)
+
+    def create_statements(self, patch):
+        """Return the DDL statements creating all partitions for a patch."""
+        statements = []
+        for table in PARTITIONED_TABLES:
+            partition = self.partition_name(table, patch)
+            statements.append(
+                'CREATE TABLE IF NOT EXISTS %s PARTITION OF %s FOR VALUES FROM (%s) TO (%s);' % (
+                    partition, table, patch, patch + 1))
+            for name, definition in PARTITION_INDEXES.get(table, ()):
+                statements.append('CREATE INDEX IF NOT EXISTS %s_%s ON %s %s;' % (
+                    partition, name.lower(), partition, definition))
+        return statements
+
+    async def attached(self, conn, table):
+        """Return the patches of all partitions currently attached to a table."""
+        rows = await conn.fetch(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON pg_inherits.inhparent = parent.oid '
+            'JOIN pg_class child ON pg_inherits.inhrelid = child.oid '
+            'WHERE parent.relname = $1;', table)
+        return sorted(int(row[0].rsplit('_', 1)[1]) for row in rows)
+
+    async def detached(self, conn, patches):
+        """Return the patches whose match partition exists as a detached table."""
+        rows = await conn.fetch(
+            "SELECT relname FROM pg_class WHERE relname = ANY($1::TEXT[]) "
+            "AND relkind = 'r' AND NOT relispartition;",
+            [self.partition_name('match', patch) for patch in patches])
+        return {int(row[0].rsplit('_', 1)[1]) for row in rows}
+
+    async def refresh(self, conn):
+        """Read the attached patches, partitions may be detached by other processors."""
+        patches = await self.attached(conn, 'match')
+        self.known = set(patches)
+        self.oldest = None
+        if self.retention and len(patches) >= self.retention:
+            self.oldest = patches[-self.retention]
+
+    def invalidate(self):
+        """Drop the cached partitions, they are read again by the next ensure.
+
+        Called after a failed insert, which may be caused by a partition detached since.
+        """
+        self.known = set()
+        self.oldest = None
+
+    async def ensure(self, conn, patches):
+        """Make sure partitions exist for all patches.
+
+        The attached partitions are read again whenever a patch is not known to be attached.
+        :returns: Set of patches that are older than the retained partitions or whose
+            partitions have been detached and can therefore not be inserted.
+        """
+        patches = set(patches)
+        expired = {patch for patch in patches if self.oldest and patch < self.oldest}
+        if patches - expired <= self.known:
+            return expired
+        async with conn.transaction():
+            await conn.execute('SELECT pg_advisory_xact_lock(%s);' % LOCK_ID)
+            await self.refresh(conn)
+            expired = {patch for patch in patches if self.oldest and patch < self.oldest}
+            missing = patches - self.known - expired
+            if missing:
+                # CREATE TABLE IF NOT EXISTS would skip the leftover table of a detached patch
+                expired |= await self.detached(conn, missing)
+                missing -= expired
+            for patch in sorted(missing):
+                for statement in self.create_statements(patch):
+                    await conn.execute(statement)
+            self.known |= missing
+            if self.retention:
+                await self.detach_expired(conn)
+        return expired | {patch for patch in patches if self.oldest and patch < self.oldest}
+
+    async def detach_expired(self, conn):
+        """Detach all partitions older than the retained patches."""
+        for table in PARTITIONED_TABLES:
+            patches = await self.attached(conn, table)
+            if len(patches) < self.retention:
+                continue
+            for patch in patches[:-self.retention]:
+                await conn.execute('ALTER TABLE %s DETACH PARTITION %s;' % (
+                    table, self.partition_name(table, patch)))
+                self.known.discard(patch)
+            self.oldest = patches[-self.retention]
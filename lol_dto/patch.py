@@ -0,0 +1,7 @@
+"""Patch helpers shared by the match related tables."""
+
+
+def patch_from_version(game_version):
+    """Return the patch of a gameVersion string as integer, e.g. 10.16.330.9186 -> 1016."""
+    major, minor = game_version.split('.', 2)[:2]
+    return int(major) * 100 + int(minor)
@@ -2,18 +2,22 @@ from . import Base
 from .enums import Server
 from sqlalchemy import Column, Enum, Boolean, BigInteger, SmallInteger, ForeignKey, VARCHAR, Integer, ARRAY
 from sqlalchemy.orm import relationship
+from .patch import patch_from_version
 
 
 class Player(Base):
     """Basic player data class."""
 
     __tablename__ = 'player'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (patch)'}
 
     matchId = Column(BigInteger, primary_key=True)
+    patch = Column(SmallInteger, primary_key=True)
     participantId = Column(SmallInteger, primary_key=True)
 
-    accountId = Column(VARCHAR(56), index=True)
-    championId = Column(SmallInteger, index=True)
+    # Indexed per partition, see partitions.py
+    accountKey = Column(BigInteger)  # Surrogate key of the accountId, see identifiers.py
+    championId = Column(SmallInteger)
     team = Column(Boolean)  # False: Blue | True: Red
     statPerks = Column(ARRAY(SmallInteger))
     summonerSpells = Column(ARRAY(SmallInteger))
@@ -75,14 +79,20 @@ class Player(Base):
     goldPerMinDeltas = Column(ARRAY(SmallInteger))
 
     @classmethod
-    async def create(cls, match, participantId):
+    async def create(cls, match, participantId, keys=None):
+        """Create the player object.
+
+        ::param keys: Mapping of account ids to their surrogate keys (see identifiers.py).
+        accountKey is left empty without it.
+        """
         participant = match['participants'][participantId - 1]
         partId = match['participantIdentities'][participantId - 1]['player']
 
         playerObject = cls(
             participantId=participantId,
             matchId=match['gameId'],
-            accountId=partId['currentAccountId'],
+            patch=patch_from_version(match['gameVersion']),
+            accountKey=keys[partId['currentAccountId']] if keys is not None else None,
             championId=participant['championId'],
             team=participantId > 5,
             statPerks=[
@@ -107,8 +117,10 @@ class Runes(Base):
     """Runes used by the player."""
 
     __tablename__ = 'runes'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (patch)'}
 
     matchId = Column(BigInteger, primary_key=True)
+    patch = Column(SmallInteger, primary_key=True)
     participantId = Column(SmallInteger, primary_key=True)
     position = Column(SmallInteger, primary_key=True)
     runeId = Column(SmallInteger)
@@ -120,10 +132,13 @@ class Runes(Base):
     async def create(cls, match, participantId):
         participant = match['participants'][participantId - 1]
 
+        patch = patch_from_version(match['gameVersion'])
+
         runeObjects = []
         for i in range(6):
             runeObjects.append(cls(
                 matchId=match['gameId'],
+                patch=patch,
                 participantId=participantId,
                 position=i,
                 runeId=participant['stats']['perk%s' % i],
@@ -132,3 +147,21 @@ class Runes(Base):
                 stats3=participant['stats']['perk%sVar3' % i],
             ))
         return runeObjects
+
+
+class PackedRunes(Base):
+    """Runes used by the player, packed into one row per participant.
+
+    Array index i holds the rune of position i. See runes.py for unpacking.
+    """
+
+    __tablename__ = 'runes_packed'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (patch)'}
+
+    matchId = Column(BigInteger, primary_key=True)
+    patch = Column(SmallInteger, primary_key=True)
+    participantId = Column(SmallInteger, primary_key=True)
+    runeIds = Column(ARRAY(SmallInteger))
+    stats1 = Column(ARRAY(Integer))
+    stats2 = Column(ARRAY(Integer))
+    stats3 = Column(ARRAY(Integer))
@@ -0,0 +1,151 @@
+"""Append only rank history of summoners.
+
+Whenever a summoner is loaded with a rank, wins or losses differing from the stored ones, a
+record is appended to `rank_history` before the summoner table is updated. Records are
+stamped with the loading transactions timestamp.
+
+The table is range partitioned by month (`rank_history_<YYYYMM>`). With a retention set,
+partitions beyond the newest `retention` months are dropped. With downsampling set, records
+older than `downsample_after` days are reduced to the last record per summoner and day. The
+day up to which records are downsampled is kept in `rank_history_downsampled`, so restarts
+resume from there.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Column, BigInteger, SmallInteger, DateTime, Boolean
+
+from .base import Base
+
+LOCK_ID = 7317  # Advisory lock serializing partition changes across processors
+
+# Appends the staged summoner whose values differ from the stored ones, see summoner_loader.py
+RECORD_CHANGES = '''
+INSERT INTO rank_history (puuid_key, timestamp, rank, wins, losses)
+SELECT staged.puuid_key, now(), staged.rank, staged.wins, staged.losses
+FROM summoner_staging staged
+LEFT JOIN summoner stored ON stored.puuid_key = staged.puuid_key
+WHERE stored.puuid_key IS NULL
+   OR (stored.rank, stored.wins, stored.losses)
+      IS DISTINCT FROM (staged.rank, staged.wins, staged.losses);
+'''
+
+DOWNSAMPLE = '''
+DELETE FROM rank_history history
+USING (
+    SELECT puuid_key, timestamp, row_number() OVER (
+        PARTITION BY puuid_key, date_trunc('day', timestamp AT TIME ZONE 'UTC')
+        ORDER BY timestamp DESC) AS position
+    FROM rank_history
+    WHERE timestamp >= $1 AND timestamp < $2
+) sampled
+WHERE history.puuid_key = sampled.puuid_key
+  AND history.timestamp = sampled.timestamp
+  AND sampled.position > 1;
+'''
+
+DOWNSAMPLED_UNTIL = 'SELECT until FROM rank_history_downsampled;'
+
+SET_DOWNSAMPLED = '''
+INSERT INTO rank_history_downsampled (single, until) VALUES (TRUE, $1)
+ON CONFLICT (single) DO UPDATE SET until = EXCLUDED.until;
+'''
+
+
+class RankHistory(Base):
+    """Rank, wins and losses of a summoner from the timestamp on."""
+
+    __tablename__ = 'rank_history'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (timestamp)'}
+
+    puuid_key = Column(BigInteger, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    rank = Column(SmallInteger)
+    wins = Column(SmallInteger)
+    losses = Column(SmallInteger)
+
+
+class Downsampled(Base):
+    """Timestamp before which the rank history is downsampled, a single row."""
+
+    __tablename__ = 'rank_history_downsampled'
+
+    single = Column(Boolean, primary_key=True)
+    until = Column(DateTime(timezone=True))
+
+
+def _month(timestamp, offset=0):
+    """Return the first day of the month `offset` months from the timestamps month."""
+    index = timestamp.year * 12 + timestamp.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+class HistoryManager:
+    """Create, drop and downsample the monthly rank history partitions."""
+
+    def __init__(self, retention=0, downsample_after=0):
+        """Set retention and downsampling.
+
+        ::param retention: Number of most recent months kept. 0 keeps all.
+        ::param downsample_after: Days after which records are reduced to one per summoner
+        and day. 0 keeps all records.
+        """
+        self.retention = retention
+        self.downsample_after = downsample_after
+        self.known = set()
+
+    @staticmethod
+    def partition_name(month):
+        """Return the partition table name of a month."""
+        return 'rank_history_%s' % month.strftime('%Y%m')
+
+    def create_statement(self, month):
+        """Return the DDL statement creating the partition of a month."""
+        return ("CREATE TABLE IF NOT EXISTS %s PARTITION OF rank_history "
+                "FOR VALUES FROM ('%s') TO ('%s');" % (
+                    self.partition_name(month), month.isoformat(), _month(month, 1).isoformat()))
+
+    async def ensure(self, conn, now=None):
+        """Make sure the partitions of the current and the next month exist."""
+        now = now or datetime.now(timezone.utc)
+        missing = {_month(now), _month(now, 1)} - self.known
+        if not missing:
+            return
+        async with conn.transaction():
+            await conn.execute('SELECT pg_advisory_xact_lock(%s);' % LOCK_ID)
+            for month in sorted(missing):
+                await conn.execute(self.create_statement(month))
+        self.known |= missing
+
+    async def record(self, conn):
+        """Append the changes held in the staging table. Has to run before the merge.
+
+        :returns: Number of appended records.
+        """
+        status = await conn.execute(RECORD_CHANGES)
+        return int(status.rsplit(' ', 1)[1])
+
+    async def maintain(self, conn, now=None):
+        """Drop expired partitions and downsample old records."""
+        now = now or datetime.now(timezone.utc)
+        if self.retention:
+            oldest = self.partition_name(_month(now, 1 - self.retention))
+            async with conn.transaction():
+                await conn.execute('SELECT pg_advisory_xact_lock(%s);' % LOCK_ID)
+                partitions = await conn.fetch(
+                    'SELECT child.relname FROM pg_inherits '
+                    'JOIN pg_class parent ON pg_inherits.inhparent = parent.oid '
+                    'JOIN pg_class child ON pg_inherits.inhrelid = child.oid '
+                    "WHERE parent.relname = 'rank_history';")
+                for partition, in partitions:
+                    if partition < oldest:
+                        await conn.execute('DROP TABLE %s;' % partition)
+        if self.downsample_after:
+            until = (now - timedelta(days=self.downsample_after)).replace(
+                hour=0, minute=0, second=0, microsecond=0)
+            async with conn.transaction():
+                await conn.execute('SELECT pg_advisory_xact_lock(%s);' % LOCK_ID)
+                since = await conn.fetchval(DOWNSAMPLED_UNTIL) or datetime(
+                    1970, 1, 1, tzinfo=timezone.utc)
+                if until > since:
+                    await conn.execute(DOWNSAMPLE, since, until)
+                    await conn.execute(SET_DOWNSAMPLED, until)
@@ -0,0 +1,40 @@
+"""Lightweight row types of the match tables.
+
+Each row type is a named tuple generated from the column definitions of its table, holding
+the values in column order. Rows carry no ORM state: they are plain tuples to asyncpg and
+pickle, while still allowing access by column name (`row.matchId`). The declarative models
+remain the source of the schema and are used for table creation. Columns with a server default,
+e.g. `match.ingested`, are filled by the database and not part of the rows.
+
+Rows are built through `tuple.__new__(RowType, values)`, skipping the per field argument
+handling of the generated constructor.
+"""
+from collections import namedtuple
+
+from .match import Match
+from .player import Player, Runes, PackedRunes
+from .team import Team
+
+
+def row_type(model, name):
+    """Return a named tuple type holding the columns of a model in definition order.
+
+    The type has to be assigned to `name` on module level to be picklable.
+    """
+    return namedtuple(name, [column.name for column in model.__table__.columns
+                             if column.server_default is None], module=__name__)
+
+
+MatchRow = row_type(Match, 'MatchRow')
+TeamRow = row_type(Team, 'TeamRow')
+PlayerRow = row_type(Player, 'PlayerRow')
+RunesRow = row_type(Runes, 'RunesRow')
+PackedRunesRow = row_type(PackedRunes, 'PackedRunesRow')
+
+ROW_TYPES = {
+    'match': MatchRow,
+    'team': TeamRow,
+    'player': PlayerRow,
+    'runes': RunesRow,
+    'runes_packed': PackedRunesRow,
+}
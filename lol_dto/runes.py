@@ -0,0 +1,62 @@
+"""SQL helpers for the packed runes storage.
+
+runes_packed stores the six runes of a participant in one row of arrays instead of six
+rows in the runes table. The `runes_unpacked` view exposes the packed data in the layout
+of the runes table, positions being 0 based.
+"""
+
+UNPACKED_VIEW = '''
+CREATE OR REPLACE VIEW runes_unpacked AS
+SELECT packed."matchId",
+       packed.patch,
+       packed."participantId",
+       (slot.position - 1)::SMALLINT AS position,
+       slot."runeId",
+       slot.stats1,
+       slot.stats2,
+       slot.stats3
+FROM runes_packed packed,
+     unnest(packed."runeIds", packed.stats1, packed.stats2, packed.stats3)
+         WITH ORDINALITY AS slot("runeId", stats1, stats2, stats3, position);
+'''
+
+# Packs the rows of one patch partition of the runes table into runes_packed.
+MIGRATE_PATCH = '''
+INSERT INTO runes_packed ("matchId", patch, "participantId", "runeIds", stats1, stats2, stats3)
+SELECT "matchId",
+       patch,
+       "participantId",
+       array_agg("runeId" ORDER BY position),
+       array_agg(stats1 ORDER BY position),
+       array_agg(stats2 ORDER BY position),
+       array_agg(stats3 ORDER BY position)
+FROM runes
+WHERE patch = $1
+GROUP BY "matchId", patch, "participantId"
+ON CONFLICT DO NOTHING;
+'''
+
+
+async def create_unpacked_view(conn):
+    """Create or replace the runes_unpacked view."""
+    await conn.execute(UNPACKED_VIEW)
+
+
+async def migrate_runes(conn, partitions, drop=False):
+    """Move the content of the runes table into runes_packed, one patch at a time.
+
+    ::param conn: asyncpg connection.
+    ::param partitions: PartitionManager used to create the runes_packed partitions.
+    ::param drop: Truncate each runes partition once its content is migrated.
+
+    :returns: Dict of migrated participant rows per patch.
+    """
+    migrated = {}
+    for patch in await partitions.attached(conn, 'runes'):
+        await partitions.ensure(conn, {patch})
+        async with conn.transaction():
+            status = await conn.execute(MIGRATE_PATCH, patch)
+            migrated[patch] = int(status.rsplit(' ', 1)[1])
+            if drop:
+                await conn.execute('TRUNCATE %s;' % partitions.partition_name('runes', patch))
+    return migrated
@@ -1,6 +1,6 @@
 from .base import Base
 
-from sqlalchemy import Column, String, Integer, ARRAY, SmallInteger, Enum
+from sqlalchemy import Column, String, Integer, ARRAY, SmallInteger, Enum, BigInteger
 from sqlalchemy.orm import relationship
 from .enums import Server
 
@@ -12,14 +12,14 @@ class Summoner(Base):
     Stores win/loss stats.
     Names are to be removed.
 
-    puuid to identify the player.
+    puuid to identify the player, stored as surrogate key (see identifiers.py).
     """
 
     __tablename__ = 'summoner'
 
-    puuid = Column(String(78), primary_key=True)
+    puuid_key = Column(BigInteger, primary_key=True)
     rank = Column("rank", SmallInteger)  # Calculated summed LP from lowest rank
     wins = Column("wins", SmallInteger)
     losses = Column("losses", SmallInteger)
 
-    account_id = Column(String(56))
+    account_key = Column(BigInteger)
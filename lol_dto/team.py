@@ -1,14 +1,17 @@
 from . import Base, Player
 from sqlalchemy import Column, String, Boolean, BigInteger, SmallInteger, ForeignKey, VARCHAR, Integer, JSON
 from sqlalchemy.orm import relationship
+from .patch import patch_from_version
 
 
 class Team(Base):
     """Team wide data and player in said team."""
 
     __tablename__ = 'team'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (patch)'}
 
     matchId = Column(BigInteger, primary_key=True)
+    patch = Column(SmallInteger, primary_key=True)
     side = Column(Boolean, primary_key=True)  # False: Blue | True: Red
     bans = Column(JSON)
 
@@ -28,6 +31,7 @@ class Team(Base):
         teamData = match['teams'][side]
         teamObject = cls(
             matchId=match['gameId'],
+            patch=patch_from_version(match['gameVersion']),
             side=side,
             bans=teamData['bans']
         )
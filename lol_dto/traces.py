@@ -0,0 +1,61 @@
+"""Completed task traces and the latency report built from them.
+
+The processors store each traced task once its data is committed (see tracing.py of the
+base image). Per trace the stages passed are stored in order, together with the time the
+task waited in the queue in front of each stage and the time the stage took to process it.
+"""
+from sqlalchemy import Column, BigInteger, DateTime, Float, String, ARRAY
+
+from .base import Base
+
+INSERT_QUERY = '''
+INSERT INTO trace_latency (origin, finished, stages, waits, durations)
+VALUES (to_timestamp($1), to_timestamp($2), $3, $4, $5);
+'''
+
+# Percentiles of queue wait and processing time per stage plus the end to end latency
+REPORT_QUERY = '''
+WITH hops AS (
+    SELECT hop.stage, hop.wait, hop.duration, hop.position
+    FROM trace_latency,
+         unnest(stages, waits, durations) WITH ORDINALITY AS hop(stage, wait, duration, position)
+    WHERE finished >= $1
+)
+SELECT stage, min(position) AS position, count(*) AS traces,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY wait) AS wait_p50,
+       percentile_cont(0.95) WITHIN GROUP (ORDER BY wait) AS wait_p95,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY duration) AS duration_p50,
+       percentile_cont(0.95) WITHIN GROUP (ORDER BY duration) AS duration_p95
+FROM hops GROUP BY stage
+UNION ALL
+SELECT 'total', 99, count(*),
+       NULL, NULL,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM finished - origin)),
+       percentile_cont(0.95) WITHIN GROUP (ORDER BY extract(epoch FROM finished - origin))
+FROM trace_latency WHERE finished >= $1
+ORDER BY position;
+'''
+
+
+class TraceLatency(Base):
+    """Latencies of a traced task across all stages."""
+
+    __tablename__ = 'trace_latency'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    origin = Column(DateTime(timezone=True))
+    finished = Column(DateTime(timezone=True), index=True)
+    stages = Column(ARRAY(String(24)))
+    waits = Column(ARRAY(Float))  # Seconds spent queued in front of each stage
+    durations = Column(ARRAY(Float))  # Seconds spent in each stage
+
+
+async def insert_traces(conn, traces):
+    """Store finished traces, see tracing.py of the base image."""
+    await conn.executemany(INSERT_QUERY, [
+        (trace.origin, trace.hops[-1][2]) + trace.latencies() for trace in traces])
+
+
+async def latency_report(conn, since):
+    """Return per stage latency percentiles of the traces finished since a timestamp."""
+    return await conn.fetch(REPORT_QUERY, since)
@@ -0,0 +1,178 @@
+"""Reflection free transformation of Match-V4 payloads into table rows.
+
+The mapping between payload keys and table columns is compiled once from the
+column definitions of the lol_dto tables. Transforming a match afterwards only
+performs dictionary lookups and emits tuple backed rows in column order (see rows.py),
+no ORM instances are created.
+"""
+from .patch import patch_from_version
+from .rows import ROW_TYPES, PlayerRow
+
+new_row = tuple.__new__
+
+
+class MatchTransformer:
+    """Transform match payloads into tuples per table.
+
+    Rows are returned as a dict of lists keyed by table name. Each table has its own row
+    type (see rows.py), the tuple layout of each table is found in `columns`.
+    """
+
+    def __init__(self, runes_storage='rows'):
+        """Compile the field mapping for all tables.
+
+        ::param runes_storage: `rows` emits six runes rows per participant, `packed` emits
+        a single runes_packed row per participant.
+        """
+        if runes_storage not in ('rows', 'packed'):
+            raise ValueError("Unknown runes storage %s." % runes_storage)
+        self.packed_runes = runes_storage == 'packed'
+        self.runes_table = 'runes_packed' if self.packed_runes else 'runes'
+        self.tables = ('match', 'team', 'player', self.runes_table)
+        self.row_types = ROW_TYPES
+        self.columns = {table: row_type._fields for table, row_type in ROW_TYPES.items()}
+        # Team: everything past the key columns is read from the team payload by name
+        self.team_keys = self.columns['team'][3:]
+
+        # Player: columns filled explicitly are followed by stats and timeline columns
+        explicit = ('matchId', 'patch', 'participantId', 'accountKey', 'championId', 'team',
+                    'statPerks', 'summonerSpells', 'items')
+        player_columns = self.columns['player']
+        if player_columns[:len(explicit)] != explicit:
+            raise ValueError("Player columns out of expected order: %s" % (player_columns,))
+        self.player_stats_keys = tuple(
+            key for key in player_columns[len(explicit):] if not key.endswith('Deltas'))
+        self.player_delta_keys = tuple(
+            key for key in player_columns[len(explicit):] if key.endswith('Deltas'))
+        if player_columns != explicit + self.player_stats_keys + self.player_delta_keys:
+            raise ValueError("Player delta columns have to be defined last.")
+        self.account_index = explicit.index('accountKey')
+        self.item_keys = tuple('item%s' % i for i in range(7))
+        self.stat_perk_keys = tuple('statPerk%s' % i for i in range(3))
+
+        # Runes: one row per rune slot, keys resolved per position
+        self.rune_keys = tuple(
+            (position, 'perk%s' % position, 'perk%sVar1' % position,
+             'perk%sVar2' % position, 'perk%sVar3' % position)
+            for position in range(6))
+        self.packed_rune_keys = tuple(zip(*self.rune_keys))[1:]
+
+    def transform(self, match, rows=None):
+        """Transform a single match payload.
+
+        :param match: Match-V4 payload as dict.
+        :param rows: Optional dict of lists to append the rows to.
+
+        :returns: Dict of row lists keyed by table name.
+        """
+        if rows is None:
+            rows = {table: [] for table in self.tables}
+        match_id = match['gameId']
+        patch = patch_from_version(match['gameVersion'])
+        teams = match['teams']
+        match_row, team_row, player_row, runes_row = [
+            self.row_types[table] for table in self.tables]
+        rows['match'].append(new_row(match_row, (
+            match_id,
+            patch,
+            match['gameCreation'] // 1000,
+            match['gameDuration'],
+            match['gameVersion'],
+            match.get('queueId'),
+            teams[0]['win'] == 'Win',
+        )))
+
+        team_rows = rows['team']
+        team_keys = self.team_keys
+        for side in range(2):
+            team = teams[side]
+            team_get = team.get
+            team_rows.append(new_row(team_row, (match_id, patch, bool(side)) + tuple([
+                team_get(key) for key in team_keys])))
+
+        player_rows = rows['player']
+        runes_rows = rows[self.runes_table]
+        packed = self.packed_runes
+        rune_ids, var1_keys, var2_keys, var3_keys = self.packed_rune_keys
+        stats_keys = self.player_stats_keys
+        delta_keys = self.player_delta_keys
+        item_keys = self.item_keys
+        stat_perk_keys = self.stat_perk_keys
+        rune_keys = self.rune_keys
+        identities = match['participantIdentities']
+        for index, participant in enumerate(match['participants']):
+            participant_id = index + 1
+            stats = participant['stats']
+            stats_get = stats.get
+            timeline = participant.get('timeline', {})
+            player_rows.append(new_row(player_row, (
+                match_id,
+                patch,
+                participant_id,
+                identities[index]['player']['currentAccountId'],
+                participant['championId'],
+                participant_id > 5,
+                [stats[key] for key in stat_perk_keys],
+                [participant['spell1Id'], participant['spell2Id']],
+                [stats[key] for key in item_keys],
+            ) + tuple([stats_get(key) for key in stats_keys]) + tuple([
+                list(timeline[key].values()) if key in timeline else None
+                for key in delta_keys])))
+            if packed:
+                runes_rows.append(new_row(runes_row, (
+                    match_id, patch, participant_id,
+                    [stats[key] for key in rune_ids],
+                    [stats[key] for key in var1_keys],
+                    [stats[key] for key in var2_keys],
+                    [stats[key] for key in var3_keys])))
+                continue
+            for position, rune, var1, var2, var3 in rune_keys:
+                runes_rows.append(new_row(runes_row, (
+                    match_id, patch, participant_id, position,
+                    stats[rune], stats[var1], stats[var2], stats[var3])))
+        return rows
+
+    def transform_many(self, matches):
+        """Transform a batch of match payloads into one dict of row lists."""
+        rows = {table: [] for table in self.tables}
+        for match in matches:
+            self.transform(match, rows)
+        return rows
+
+    def account_ids(self, rows):
+        """Return the account ids referenced by the player rows."""
+        index = self.account_index
+        return {row[index] for row in rows['player']}
+
+    def encode_accounts(self, rows, keys):
+        """Return the rows with the account ids of the player rows replaced by their keys.
+
+        Player rows are emitted holding the raw accountId, see identifiers.py.
+        """
+        index = self.account_index
+        return dict(rows, player=[
+            new_row(PlayerRow, row[:index] + (keys[row[index]],) + row[index + 1:])
+            for row in rows['player']])
+
+    def exclude(self, rows, match_ids):
+        """Return the rows without those belonging to any of the given matchIds.
+
+        All tables carry the matchId as first and the patch as second column.
+        """
+        return {
+            table: [row for row in table_rows if row[0] not in match_ids]
+            for table, table_rows in rows.items()
+        }
+
+    def merge(self, row_sets):
+        """Merge multiple dicts of row lists, keeping only the first occurrence of each match."""
+        rows = {table: [] for table in self.tables}
+        seen = set()
+        for row_set in row_sets:
+            ids = {row[0] for row in row_set['match']}
+            if ids & seen:
+                row_set = self.exclude(row_set, seen)
+            seen |= ids
+            for table in self.tables:
+                rows[table] += row_set[table]
+        return rows
@@ -0,0 +1,27 @@
+"""Batching of consumed messages for the processors."""
+import asyncio
+
+
+async def collect(messages, size, linger, stopped):
+    """Collect a batch of messages.
+
+    The batch is cut once it is full or `linger` seconds after its first message.
+    ::param messages: asyncio.Queue the consumer puts the messages in.
+    ::param size: Maximum number of messages in a batch.
+    ::param linger: Seconds a partial batch waits for further messages.
+    ::param stopped: Callable returning True once the processor shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    batch = []
+    deadline = None
+    while len(batch) < size and not stopped():
+        timeout = 1 if deadline is None else deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(messages.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            continue
+        if deadline is None:
+            deadline = loop.time() + linger
+    return batch
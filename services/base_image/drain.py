@@ -0,0 +1,38 @@
+"""Graceful drain of a stage on shutdown.
+
+On SIGTERM (see regions.py) a stage stops consuming, which returns the prefetched messages to
+its queue, and gives the tasks in flight DRAIN_TIMEOUT seconds to finish. Tasks still running
+after that are cancelled and their workers return the messages to the queue (nack with
+requeue), to be picked up again after the restart. The stage then closes its marker and writes
+its outstanding tasks to the backup.
+"""
+import asyncio
+import os
+
+
+async def drain(consumer, tasks, logger, timeout=None):
+    """Stop consuming and settle the tasks in flight.
+
+    ::param consumer: Queue iterator of the stage, None for stages without an input queue.
+    ::param tasks: Callable returning the current tasks of the stage. Called repeatedly as tasks
+    can be replaced by retries.
+    ::param logger: Logger of the stage.
+    ::param timeout: Seconds given to the tasks, DRAIN_TIMEOUT if None.
+    :returns: Number of cancelled tasks.
+    """
+    if timeout is None:
+        timeout = float(os.environ.get('DRAIN_TIMEOUT', 20))
+    if consumer:
+        await consumer.close()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = [task for task in tasks() if not task.done()]
+    logger.info("Draining %s tasks.", len(pending))
+    while pending and (remaining := deadline - loop.time()) > 0:
+        await asyncio.wait(pending, timeout=remaining)
+        pending = [task for task in tasks() if not task.done()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    logger.info("Drained, %s tasks cancelled.", len(pending))
+    return len(pending)
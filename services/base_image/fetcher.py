@@ -0,0 +1,129 @@
+"""Shared request path of the services towards the API proxy."""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+from exceptions import RatelimitException, NotFoundException, Non200Exception
+from ledger import Ledger
+from recorder import Recorder
+
+KEY_HEADER = 'x-key'  # Index of the API key a response was returned by, see proxy.py
+
+
+def message_key(message):
+    """Return the API key index a message was created with, None if it carries none."""
+    key = (message.headers or {}).get(KEY_HEADER)
+    if isinstance(key, bytes):
+        key = key.decode()
+    return key
+
+
+def key_headers(key, headers=None):
+    """Return the message headers extended by the API key index if one is given."""
+    if key is None:
+        return headers
+    return dict(headers or {}, **{KEY_HEADER: key})
+
+
+class Fetcher:
+    """Execute API calls through the proxy, optionally recording the responses.
+
+    The proxy defaults to the servers proxy container and can be replaced through PROXY,
+    e.g. to run against the replayer. Every call is counted in the ledger (see ledger.py).
+
+    With several API keys in the proxy, encrypted ids are only valid with the key that
+    returned them. `fetch_keyed` returns the key index of a response and pins a call to a
+    given key, the index is passed on with the tasks created from a response.
+    """
+
+    def __init__(self, server, endpoint, ledger=None):
+        """Set proxy, recorder and ledger.
+
+        ::param endpoint: Name of the endpoint called, used in the ledger.
+        ::param ledger: Ledger shared with the fetchers of other servers (see regions.py),
+        calls are counted as `<server>:<endpoint>`. A ledger of the server is used if None.
+        """
+        self.logging = logging.getLogger("Fetcher_%s" % server)
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%%(asctime)s [Fetcher %s] %%(message)s' % server))
+        self.logging.addHandler(handler)
+
+        self.proxy = os.environ.get('PROXY', "http://lightshield_proxy_%s:8000" % server.lower())
+        self.retry_after = datetime.now()  # Set from the Retry-After header of 429 responses
+        self.recorder = Recorder.from_env(server)
+        self.owns_ledger = ledger is None
+        self.ledger = Ledger(server) if self.owns_ledger else ledger
+        self.endpoint = endpoint if self.owns_ledger else '%s:%s' % (server, endpoint)
+
+    async def init(self):
+        """Start the ledger unless it is shared."""
+        if self.owns_ledger:
+            await self.ledger.init()
+
+    def avoided(self):
+        """Count a call not issued as its data is already held, see ledger.py."""
+        self.ledger.record(self.endpoint, 'avoided')
+
+    async def fetch(self, session, url, classify=None):
+        """Execute call to external target using the proxy server.
+
+        See fetch_keyed, returning only the content.
+        """
+        content, _ = await self.fetch_keyed(session, url, classify=classify)
+        return content
+
+    async def fetch_keyed(self, session, url, key=None, classify=None):
+        """Execute call to external target using the proxy server.
+
+        Receives aiohttp session as well as url to be called. Executes the request and returns
+        either the content of the response as json or raises an exeption depending on response.
+        :param session: The aiohttp Clientsession used to execute the call.
+        :param url: String url ready to be requested.
+        :param key: Index of the API key the call is pinned to, any key is used if None.
+        :param classify: Optional function returning the ledger outcome of a successful
+        response, `useful`, `repeated` or `empty`. Responses are counted as useful otherwise.
+
+        :returns: Request response as dict and the index of the API key used.
+
+        :raises RatelimitException: on 429 or 430 HTTP Code.
+        :raises NotFoundException: on 404 HTTP Code.
+        :raises Non200Exception: on any other non 200 HTTP Code.
+        """
+        headers = {KEY_HEADER: key} if key is not None else None
+        started = time.time()
+        try:
+            async with session.get(url, proxy=self.proxy, headers=headers) as response:
+                body = await response.text()
+        except aiohttp.ClientConnectionError as err:
+            self.logging.info("Error %s", err)
+            self.ledger.record(self.endpoint, 'error')
+            raise Non200Exception()
+        if self.recorder:
+            self.recorder.record(started, url, response.status, response.headers, body)
+        if response.status in [429, 430]:
+            self.ledger.record(self.endpoint, 'rate_limited')
+            if "Retry-After" in response.headers:
+                delay = int(response.headers['Retry-After'])
+                self.retry_after = datetime.now() + timedelta(seconds=delay)
+            raise RatelimitException()
+        if response.status == 404:
+            self.ledger.record(self.endpoint, 'not_found')
+            raise NotFoundException()
+        if response.status != 200:
+            self.ledger.record(self.endpoint, 'error')
+            raise Non200Exception()
+        content = await response.json(content_type=None)
+        self.ledger.record(self.endpoint, classify(content) if classify else 'useful')
+        return content, response.headers.get(KEY_HEADER)
+
+    async def close(self):
+        """Write the remaining ledger counts and close the recording if one is written."""
+        if self.owns_ledger:
+            await self.ledger.close()
+        if self.recorder:
+            self.recorder.close()
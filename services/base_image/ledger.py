@@ -0,0 +1,124 @@
+"""Ledger of the API calls issued by a service, classified by endpoint and outcome.
+
+Outcomes:
+- useful: The response carried new data.
+- repeated: The data was pulled before, detected from the marker of the stage, e.g. matches
+  pulled again after match_details evicted their gameId from its marker.
+- empty: The response carried no data of use, e.g. an empty league page.
+- not_found: 404 response.
+- rate_limited: 429 or 430 response.
+- error: Any other response or a failed connection to the proxy.
+
+Calls not issued as the marker of the stage already holds their data, e.g. known summonerIds
+or pulled gameIds, are counted as `avoided`. Markers are kept across restarts and tasks are
+routed to the replica owning their marker (see sharding.py).
+
+Counts are kept per hour in memory and periodically added to a local SQLite database.
+Usage: python ledger.py [hours] [directory]
+Prints the calls of the last `hours` hours (24 by default) of all ledgers in the directory.
+"""
+import asyncio
+import glob
+import os
+import socket
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+import aiosqlite
+
+OUTCOMES = ('useful', 'repeated', 'empty', 'not_found', 'rate_limited', 'error')
+AVOIDED = 'avoided'  # Calls not issued, not part of the outcomes of issued calls
+RENAMED = {'duplicate': 'repeated'}  # Outcomes written by earlier versions
+
+CREATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS ledger(
+    hour INTEGER,
+    endpoint TEXT,
+    outcome TEXT,
+    calls INTEGER,
+    PRIMARY KEY (hour, endpoint, outcome));
+'''
+
+UPSERT = '''
+INSERT INTO ledger (hour, endpoint, outcome, calls) VALUES (?, ?, ?, ?)
+ON CONFLICT (hour, endpoint, outcome) DO UPDATE SET calls = calls + excluded.calls;
+'''
+
+
+class Ledger:
+    """Count API calls per endpoint and outcome."""
+
+    def __init__(self, server, directory='sqlite', interval=60):
+        """Set storage.
+
+        ::param interval: Seconds between writes to the database.
+        """
+        self.path = os.path.join(directory, 'ledger_%s_%s.db' % (server, socket.gethostname()))
+        self.interval = interval
+        self.counts = Counter()
+        self.flush_task = None
+
+    def record(self, endpoint, outcome):
+        """Count a single call."""
+        self.counts[(int(time.time() // 3600 * 3600), endpoint, outcome)] += 1
+
+    async def init(self):
+        """Create the table and start periodic writes."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        async with aiosqlite.connect(self.path) as db:
+            await db.execute(CREATE_TABLE)
+            await db.commit()
+        self.flush_task = asyncio.create_task(self.run())
+
+    async def run(self):
+        """Write the counts every interval."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        """Add the counts collected since the last write to the database."""
+        if not self.counts:
+            return
+        counts, self.counts = self.counts, Counter()
+        async with aiosqlite.connect(self.path) as db:
+            await db.executemany(UPSERT, [key + (calls,) for key, calls in counts.items()])
+            await db.commit()
+
+    async def close(self):
+        """Stop periodic writes and write the remaining counts."""
+        if self.flush_task:
+            self.flush_task.cancel()
+        await self.flush()
+
+
+def report(pattern, since):
+    """Return calls per endpoint and outcome summed over all ledgers matching a glob pattern."""
+    totals = Counter()
+    for path in glob.glob(pattern):
+        with sqlite3.connect(path) as db:
+            for endpoint, outcome, calls in db.execute(
+                    'SELECT endpoint, outcome, SUM(calls) FROM ledger '
+                    'WHERE hour >= ? GROUP BY endpoint, outcome;', (since,)):
+                totals[(endpoint, RENAMED.get(outcome, outcome))] += calls
+    return totals
+
+
+def main(hours, directory):
+    """Print the call report."""
+    totals = report(os.path.join(directory, 'ledger_*.db'), time.time() - hours * 3600)
+    endpoints = sorted({endpoint for endpoint, _ in totals})
+    print("%-16s %10s" % ("endpoint", "calls") + "".join(" %13s" % outcome for outcome in OUTCOMES)
+          + " %10s" % AVOIDED)
+    for endpoint in endpoints:
+        calls = sum(totals[(endpoint, outcome)] for outcome in OUTCOMES)
+        print("%-16s %10s" % (endpoint, calls) + "".join(
+            " %12.1f%%" % (100 * totals[(endpoint, outcome)] / max(calls, 1))
+            for outcome in OUTCOMES) + " %10s" % totals[(endpoint, AVOIDED)])
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 24,
+         sys.argv[2] if len(sys.argv) > 2 else 'sqlite')
@@ -0,0 +1,134 @@
+"""On demand sampling profiler of a services event loop.
+
+A profile is triggered by SIGUSR1 or, with PROFILE_PORT set, by a request to
+http://127.0.0.1:<PROFILE_PORT>/profile?seconds=<N> from within the container. For the
+duration of the profile a background thread samples the stack of the event loop thread while
+a task measures the event loop lag, i.e. how late a sleeping task is woken up.
+
+Results are written to the profiles directory:
+- <name>_<timestamp>.collapsed: Sampled stacks in collapsed format, one `frame;frame count`
+  line per distinct stack, readable by flamegraph.pl or speedscope.
+- <name>_<timestamp>.lag.json: Lag percentiles and raw measurements in seconds.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _percentile(values, share):
+    """Return the value at the given share of the sorted values."""
+    return values[min(len(values) - 1, int(len(values) * share))] if values else None
+
+
+class Profiler:
+    """Sample stacks and event loop lag for a limited time."""
+
+    def __init__(self, name, directory='profiles'):
+        """Set output and sampling settings.
+
+        ::param name: Service name the profiles are prefixed with.
+        """
+        self.logging = logging.getLogger("Profiler")
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s [Profiler] %(message)s'))
+        self.logging.addHandler(handler)
+
+        self.name = '%s_%s' % (name, socket.gethostname())
+        self.directory = directory
+        self.seconds = float(os.environ.get('PROFILE_SECONDS', 30))
+        self.port = int(os.environ.get('PROFILE_PORT', 0))
+        self.sample_interval = 0.005
+        self.lag_interval = 0.05
+        self.thread_id = None
+        self.running = None
+        self.runner = None
+
+    async def install(self):
+        """Register the signal handler and start the HTTP endpoint if configured."""
+        loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        loop.add_signal_handler(signal.SIGUSR1, self.trigger)
+        if self.port:
+            from aiohttp import web  # pylint: disable=C0415
+            app = web.Application()
+            app.router.add_get('/profile', self.handle)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            await web.TCPSite(self.runner, '127.0.0.1', self.port).start()
+
+    def trigger(self, seconds=None):
+        """Start a profile unless one is running. Returns the profiling task."""
+        if self.running and not self.running.done():
+            self.logging.info("Profile already running.")
+            return self.running
+        self.running = asyncio.ensure_future(self.profile(seconds or self.seconds))
+        return self.running
+
+    async def handle(self, request):
+        """Run a profile for the requested seconds and return the written files."""
+        from aiohttp import web  # pylint: disable=C0415
+        seconds = float(request.query.get('seconds', self.seconds))
+        return web.json_response(await self.trigger(seconds))
+
+    async def profile(self, seconds):
+        """Profile for the given seconds and write the results.
+
+        :returns: Paths of the written files.
+        """
+        self.logging.info("Profiling for %s seconds.", seconds)
+        stop = threading.Event()
+        stacks = Counter()
+        sampler = threading.Thread(target=self.sample, args=(stacks, stop), daemon=True)
+        sampler.start()
+        loop = asyncio.get_running_loop()
+        lags = []
+        end = loop.time() + seconds
+        while loop.time() < end:
+            before = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lags.append(loop.time() - before - self.lag_interval)
+        stop.set()
+        sampler.join()
+        return await loop.run_in_executor(None, self.write, stacks, lags)
+
+    def sample(self, stacks, stop):
+        """Sample the event loop threads stack until stopped."""
+        while not stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=W0212
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append('%s:%s' % (os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            if stack:
+                stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, stacks, lags):
+        """Write sampled stacks and lag measurements, returning the paths."""
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(self.directory, '%s_%s' % (self.name, int(time.time())))
+        with open(prefix + '.collapsed', 'w') as file:
+            for stack, count in stacks.most_common():
+                file.write('%s %s\n' % (stack, count))
+        ordered = sorted(lags)
+        with open(prefix + '.lag.json', 'w') as file:
+            json.dump({
+                'interval': self.lag_interval,
+                'p50': _percentile(ordered, 0.5),
+                'p95': _percentile(ordered, 0.95),
+                'p99': _percentile(ordered, 0.99),
+                'max': ordered[-1] if ordered else None,
+                'samples': lags,
+            }, file)
+        self.logging.info("Wrote %s stack samples to %s.collapsed.", sum(stacks.values()), prefix)
+        return [prefix + '.collapsed', prefix + '.lag.json']
@@ -0,0 +1,81 @@
+"""Recording of the API traffic passing through the fetcher.
+
+With RECORD_DIR set, every response received from the proxy is appended to a gzip compressed
+file of JSON lines, one file per service instance. Each record holds the requests wall clock
+time, the url, the response status, rate limit related headers, the latency and the body.
+The replayer service serves recorded files as a stand in for the proxy.
+"""
+import glob
+import gzip
+import json
+import os
+import socket
+import time
+
+# Response headers kept with each record
+RECORDED_HEADERS = ('Retry-After', 'X-Rate-Limit-Type', 'X-App-Rate-Limit',
+                    'X-App-Rate-Limit-Count', 'X-Method-Rate-Limit',
+                    'X-Method-Rate-Limit-Count')
+
+
+class Recorder:
+    """Append request/response pairs to a compressed recording."""
+
+    def __init__(self, directory, name, flush_every=100):
+        """Open the recording file.
+
+        ::param directory: Directory the recording is written to.
+        ::param name: Name of the recording, extended by the start time.
+        ::param flush_every: Number of records after which the file is flushed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, '%s_%s.jsonl.gz' % (name, int(time.time())))
+        self.file = gzip.open(self.path, 'at')
+        self.flush_every = flush_every
+        self.pending = 0
+
+    @classmethod
+    def from_env(cls, server):
+        """Return a recorder if RECORD_DIR is set, else None."""
+        if 'RECORD_DIR' not in os.environ:
+            return None
+        return cls(os.environ['RECORD_DIR'], '%s_%s' % (server, socket.gethostname()))
+
+    def record(self, started, url, status, headers, body):
+        """Append a single response.
+
+        ::param started: Wall clock time the request was sent at.
+        """
+        self.file.write(json.dumps({
+            'time': started,
+            'latency': time.time() - started,
+            'url': url,
+            'status': status,
+            'headers': {key: headers[key] for key in RECORDED_HEADERS if key in headers},
+            'body': body,
+        }) + '\n')
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        """Flush and close the recording."""
+        self.file.close()
+
+
+def read_records(pattern):
+    """Return all records of the recordings matching a glob pattern, ordered by time.
+
+    Records of recordings cut off by a crash are read up to the last complete line.
+    """
+    records = []
+    for path in sorted(glob.glob(pattern)):
+        with gzip.open(path, 'rt') as file:
+            try:
+                for line in file:
+                    records.append(json.loads(line))
+            except (EOFError, json.JSONDecodeError):
+                pass
+    records.sort(key=lambda record: record['time'])
+    return records
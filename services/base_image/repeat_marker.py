@@ -8,21 +8,30 @@ import os
 import socket
 
 import aiosqlite
+from sharding import shard
 
 
 class RepeatMarker:
     """Marker class."""
 
-    def __init__(self, connections=1):
-        """Set logger and initial elements"""
+    def __init__(self, connections=1, server=None):
+        """Set logger and initial elements.
+
+        ::param server: Server the marker file belongs to, SERVER if None.
+        """
         self.max_connections = connections
+        self.server = server or os.environ['SERVER']
+        # Sharded replicas own the marker of their shard, see sharding.py
+        self.dbname = "sqlite/%s_%s.db" % (self.server, socket.gethostname())
+        if (index := shard()) is not None:
+            self.dbname = "sqlite/%s_%s_shard%s.db" % (self.server, socket.gethostname(), index)
 
-        self.logging = logging.getLogger("RepeatMarker")
+        self.logging = logging.getLogger("RepeatMarker_%s" % self.server)
         self.logging.setLevel(logging.INFO)
         handler = logging.StreamHandler()
         handler.setLevel(logging.INFO)
         handler.setFormatter(
-            logging.Formatter('%(asctime)s [RepeatMarker] %(message)s'))
+            logging.Formatter('%%(asctime)s [RepeatMarker %s] %%(message)s' % self.server))
         self.logging.addHandler(handler)
 
         self.connection = None
@@ -52,14 +61,25 @@ class RepeatMarker:
         Number of connections is determined by the connections parameter supplied in the
         __init__ method.
         """
-        dbname = "sqlite/%s_%s.db" % (os.environ['SERVER'], socket.gethostname())
-        self.connection = await aiosqlite.connect(dbname)
+        self.connection = await aiosqlite.connect(self.dbname)
+
+    async def close(self):
+        """Close the connection, all writes are committed on execution."""
+        if self.connection:
+            await self.connection.close()
+            self.connection = None
+
+    async def add_column(self, table, column, definition):
+        """Add a column to a table of an existing marker file if it is missing."""
+        columns = [row[1] for row in await self.execute_read('PRAGMA table_info(%s);' % table)]
+        if column not in columns:
+            self.logging.info("Adding column %s to %s.", column, table)
+            await self.execute_write('ALTER TABLE %s ADD COLUMN %s %s;' % (table, column, definition))
 
     async def build(self, query):
         """Try to create SQL tables."""
-        dbname = "sqlite/%s_%s.db" % (os.environ['SERVER'], socket.gethostname())
-        if not os.path.exists(dbname):
+        if not os.path.exists(self.dbname):
             self.logging.info("No DB File found. Creating.")
-            async with aiosqlite.connect(dbname) as db:
+            async with aiosqlite.connect(self.dbname) as db:
                 await db.execute(query)
                 await db.commit()
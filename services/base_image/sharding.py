@@ -0,0 +1,74 @@
+"""Sharding of stage replicas through consistent hash routing.
+
+Publishers route each task by its key (summonerId to summoner_ids, accountId to
+match_history, gameId to match_details) onto one of SLOTS fixed routing keys. The slot of a
+key never changes. structural_creator places the shards of a stage on a hash ring and binds
+each slot to the shard queue owning it, so a key is always consumed by the same replica and
+only that replica's marker holds it.
+
+Replicas select their shard through SHARD. Without SHARD the unsharded queue and marker are
+used, which is equal to a stage with a single shard.
+"""
+import bisect
+import hashlib
+import os
+
+SLOTS = 256  # Fixed number of routing keys, changing it moves all keys
+REPLICAS = 160  # Points per shard on the ring
+
+
+def digest(value):
+    """Return a stable integer hash of the value."""
+    return int(hashlib.md5(str(value).encode()).hexdigest()[:8], 16)
+
+
+def routing_key(key):
+    """Return the routing key of a task key."""
+    return str(digest(key) % SLOTS)
+
+
+def shard():
+    """Return the shard set in SHARD, None if the replica is unsharded."""
+    if 'SHARD' in os.environ:
+        return int(os.environ['SHARD'])
+    return None
+
+
+def queue_name(name, index=None):
+    """Return the name of a shard queue.
+
+    ::param index: Shard of the queue, the shard set in SHARD if None.
+    """
+    if index is None:
+        index = shard()
+    if index is None:
+        return name
+    return "%s_%s" % (name, index)
+
+
+class HashRing:
+    """Consistent hash ring of the shards of a stage.
+
+    Adding a shard to N shards moves about 1/(N+1) of the slots, all of them to the new shard.
+    """
+
+    def __init__(self, shards, replicas=REPLICAS):
+        """Place the shards on the ring.
+
+        ::param shards: Number of shards.
+        ::param replicas: Points per shard, more points spread the slots more evenly.
+        """
+        self.shards = shards
+        points = sorted((digest("%s-%s" % (index, replica)), index)
+                        for index in range(shards) for replica in range(replicas))
+        self.points = [point for point, _ in points]
+        self.owners = [index for _, index in points]
+
+    def owner(self, slot):
+        """Return the shard owning a slot."""
+        position = bisect.bisect(self.points, digest("slot-%s" % slot)) % len(self.points)
+        return self.owners[position]
+
+    def slots(self, index):
+        """Return the routing keys bound to a shard."""
+        return [str(slot) for slot in range(SLOTS) if self.owner(slot) == index]
@@ -0,0 +1,86 @@
+"""Shedding of low value tasks while the output of a stage is blocked.
+
+While the output queue of a stage is full every task processed ends up in the outstanding
+messages of the RabbitManager, spending API calls on data that can not move on. Before a
+task calls the API its value is checked: tasks below the minimum priority (see
+structural_creator) or rated low value by the stage are shed instead.
+
+Policies, set through SHED_POLICY:
+- off: Tasks are never shed.
+- defer: Shed messages are returned to the queue (nack with requeue), to be consumed again
+  once the output is free.
+- drop: Shed messages are acknowledged and discarded. Nothing is marked as done, so players
+  are picked up again by later updates.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+
+POLICIES = ('off', 'defer', 'drop')
+
+
+class Shedder:
+    """Decide on and settle messages shed while output is blocked."""
+
+    def __init__(self, name, interval=60):
+        """Set policy and thresholds from the environment.
+
+        ::param name: Service name used in the log.
+        ::param interval: Seconds between logging the counts.
+        """
+        self.logging = logging.getLogger("Shedder %s" % name)
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s [Shedder] %(message)s'))
+        self.logging.addHandler(handler)
+
+        self.name = name
+        self.policy = os.environ.get('SHED_POLICY', 'off')
+        if self.policy not in POLICIES:
+            raise ValueError("SHED_POLICY has to be one of %s." % ", ".join(POLICIES))
+        self.min_priority = int(os.environ.get('SHED_MIN_PRIORITY', 0))
+        self.interval = interval
+        self.counts = Counter()  # Keyed by outcome: deferred, dropped or kept while blocked
+        self.report_task = None
+
+    async def init(self):
+        """Start logging the counts."""
+        if self.policy != 'off':
+            self.report_task = asyncio.create_task(self.report())
+
+    async def shed(self, message, blocked, low_value=False):
+        """Shed the message of a task if the output is blocked and the task is of low value.
+
+        ::param blocked: Whether the output of the stage is currently blocked.
+        ::param low_value: Stage specific rating, shed independent of the priority.
+        :returns: True if the message was settled and the task is to be skipped.
+        """
+        if self.policy == 'off' or not blocked:
+            return False
+        if not low_value and (message.priority or 0) >= self.min_priority:
+            self.counts['kept'] += 1
+            return False
+        if self.policy == 'defer':
+            await message.nack(requeue=True)
+            self.counts['deferred'] += 1
+        else:
+            await message.ack()
+            self.counts['dropped'] += 1
+        return True
+
+    async def report(self):
+        """Log the counts collected since the last report."""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.counts:
+                counts, self.counts = self.counts, Counter()
+                self.logging.info("%s output blocked: %s deferred, %s dropped, %s kept.", self.name,
+                                  counts['deferred'], counts['dropped'], counts['kept'])
+
+    async def close(self):
+        """Stop logging the counts."""
+        if self.report_task:
+            self.report_task.cancel()
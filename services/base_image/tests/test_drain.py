@@ -0,0 +1,38 @@
+# flake8: noqa
+import asyncio
+import logging
+from unittest.mock import AsyncMock
+
+from services.base_image.drain import drain
+
+
+def test_drain():
+    async def run():
+        tasks = [asyncio.create_task(asyncio.sleep(0.01)),
+                 asyncio.create_task(asyncio.sleep(10))]
+        consumer = AsyncMock()
+        cancelled = await drain(consumer, lambda: tasks, logging.getLogger('test'), timeout=0.1)
+        consumer.close.assert_awaited_once()
+        return cancelled, tasks
+
+    cancelled, (finished, cut_off) = asyncio.run(run())
+    assert cancelled == 1
+    assert not finished.cancelled()
+    assert cut_off.cancelled()
+
+
+def test_drain_replaced_tasks():
+    async def run():
+        tasks = []
+
+        async def retry():
+            await asyncio.sleep(0.01)
+            tasks.append(asyncio.create_task(asyncio.sleep(0.01)))
+
+        tasks.append(asyncio.create_task(retry()))
+        cancelled = await drain(None, lambda: tasks, logging.getLogger('test'), timeout=1)
+        return cancelled, tasks
+
+    cancelled, tasks = asyncio.run(run())
+    assert cancelled == 0
+    assert len(tasks) == 2 and all(task.done() for task in tasks)
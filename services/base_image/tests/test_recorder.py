@@ -0,0 +1,28 @@
+# flake8: noqa
+import os
+
+from services.base_image.recorder import Recorder, read_records
+
+
+class TestRecorder:
+
+    def test_roundtrip(self, tmp_path):
+        recorder = Recorder(str(tmp_path), 'EUW1_test')
+        recorder.record(2.0, 'http://euw1.api.riotgames.com/b', 200, {'Server': 'x'}, '{}')
+        recorder.record(1.0, 'http://euw1.api.riotgames.com/a', 429, {'Retry-After': '1'}, '')
+        recorder.close()
+        records = read_records(os.path.join(str(tmp_path), '*.jsonl.gz'))
+        assert [record['url'][-1] for record in records] == ['a', 'b']
+        assert records[0]['headers'] == {'Retry-After': '1'}
+        assert records[1]['headers'] == {}
+
+    def test_truncated_recording(self, tmp_path):
+        recorder = Recorder(str(tmp_path), 'EUW1_test')
+        for index in range(3):
+            recorder.record(index, 'http://euw1.api.riotgames.com/%s' % index, 200, {}, 'x' * 1000)
+        recorder.close()
+        with open(recorder.path, 'rb') as file:
+            content = file.read()
+        with open(recorder.path, 'wb') as file:
+            file.write(content[:len(content) // 2])
+        assert len(read_records(recorder.path)) < 3
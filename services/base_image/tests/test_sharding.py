@@ -0,0 +1,30 @@
+# flake8: noqa
+from services.base_image.sharding import SLOTS, HashRing, queue_name, routing_key
+
+
+def test_routing_key():
+    assert routing_key('abc') == routing_key('abc')
+    assert 0 <= int(routing_key(4711)) < SLOTS
+
+
+def test_queue_name(monkeypatch):
+    monkeypatch.delenv('SHARD', raising=False)
+    assert queue_name('EUW1_HISTORY_TO_DETAILS') == 'EUW1_HISTORY_TO_DETAILS'
+    monkeypatch.setenv('SHARD', '2')
+    assert queue_name('EUW1_HISTORY_TO_DETAILS') == 'EUW1_HISTORY_TO_DETAILS_2'
+    assert queue_name('EUW1_HISTORY_TO_DETAILS', 0) == 'EUW1_HISTORY_TO_DETAILS_0'
+
+
+class TestHashRing:
+
+    def test_slots(self):
+        ring = HashRing(3)
+        slots = [ring.slots(index) for index in range(3)]
+        assert sorted(sum(slots, []), key=int) == [str(slot) for slot in range(SLOTS)]
+        assert all(slots)
+
+    def test_added_shard(self):
+        before, after = HashRing(3), HashRing(4)
+        moved = [slot for slot in range(SLOTS) if before.owner(slot) != after.owner(slot)]
+        assert {after.owner(slot) for slot in moved} == {3}
+        assert len(moved) < SLOTS / 2
@@ -0,0 +1,44 @@
+# flake8: noqa
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from services.base_image.shedding import Shedder
+
+
+def message(priority):
+    return Mock(priority=priority, ack=AsyncMock(), nack=AsyncMock())
+
+
+class TestShedder:
+
+    def test_off(self, monkeypatch):
+        monkeypatch.setenv('SHED_POLICY', 'off')
+        assert not asyncio.run(Shedder('test').shed(message(0), True))
+
+    def test_defer(self, monkeypatch):
+        monkeypatch.setenv('SHED_POLICY', 'defer')
+        monkeypatch.setenv('SHED_MIN_PRIORITY', '5')
+        shedder = Shedder('test')
+        low, high = message(2), message(7)
+        assert not asyncio.run(shedder.shed(low, False))
+        assert asyncio.run(shedder.shed(low, True))
+        low.nack.assert_awaited_once_with(requeue=True)
+        assert not asyncio.run(shedder.shed(high, True))
+        assert asyncio.run(shedder.shed(high, True, low_value=True))
+        assert shedder.counts == {'deferred': 2, 'kept': 1}
+
+    def test_drop(self, monkeypatch):
+        monkeypatch.setenv('SHED_POLICY', 'drop')
+        monkeypatch.setenv('SHED_MIN_PRIORITY', '5')
+        shedder = Shedder('test')
+        low = message(None)
+        assert asyncio.run(shedder.shed(low, True))
+        low.ack.assert_awaited_once()
+        assert shedder.counts == {'dropped': 1}
+
+    def test_invalid_policy(self, monkeypatch):
+        monkeypatch.setenv('SHED_POLICY', 'skip')
+        with pytest.raises(ValueError):
+            Shedder('test')
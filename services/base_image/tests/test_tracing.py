@@ -0,0 +1,26 @@
+# flake8: noqa
+import json
+from unittest.mock import Mock
+
+from services.base_image.tracing import TRACE_HEADER, Trace, trace_headers
+
+
+class TestTrace:
+
+    def test_untraced(self):
+        assert Trace.start('league_rankings', 0) is None
+        assert Trace.receive(Mock(headers=None), 'summoner_ids') is None
+        assert trace_headers(None) is None
+
+    def test_hops(self):
+        trace = Trace.start('league_rankings', 1)
+        headers = trace.headers()
+        received = Trace.receive(Mock(headers=headers), 'summoner_ids')
+        forwarded = Trace.receive(
+            Mock(headers={TRACE_HEADER: received.headers()[TRACE_HEADER].encode()}), 'match_history')
+        forwarded.finish()
+        stages, waits, durations = forwarded.latencies()
+        assert stages == ['league_rankings', 'summoner_ids', 'match_history']
+        assert waits[0] == 0
+        assert all(value >= 0 for value in waits + durations)
+        assert json.loads(headers[TRACE_HEADER])['origin'] == forwarded.origin
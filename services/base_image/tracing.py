@@ -0,0 +1,96 @@
+"""Trace context passed along with tasks from league_rankings to the processors.
+
+A sampled share of the tasks created by league_rankings starts a trace. The trace travels in
+the `x-trace` message header and holds the origin time and one hop per stage:
+[stage, received, sent]. Each stage receiving a traced message adds its hop and passes the
+trace on with every task it creates from the message. The processors close the last hop once
+the data is committed and store the trace, see lol_dto/traces.py.
+
+Queue wait of a stage is the time between the previous stage sending and the stage receiving,
+processing time the time between receiving and sending.
+"""
+import json
+import random
+import time
+
+TRACE_HEADER = 'x-trace'
+
+
+class Trace:
+    """Origin time and per stage hops of a task."""
+
+    def __init__(self, origin, hops):
+        """Set trace content."""
+        self.origin = origin
+        self.hops = hops
+
+    @classmethod
+    def start(cls, stage, sample):
+        """Start a trace for the given share of calls, else return None.
+
+        ::param sample: Share of calls starting a trace, 0 disables tracing.
+        """
+        if not sample or random.random() >= sample:
+            return None
+        now = time.time()
+        return cls(now, [[stage, now, None]])
+
+    @classmethod
+    def receive(cls, message, stage):
+        """Continue the trace of a received message, None if it carries none."""
+        raw = (message.headers or {}).get(TRACE_HEADER)
+        if not raw:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        content = json.loads(raw)
+        return cls(content['origin'], content['hops'] + [[stage, time.time(), None]])
+
+    def headers(self):
+        """Return the message headers passing the trace on, closing the current hop."""
+        hops = self.hops[:-1] + [self.hops[-1][:2] + [time.time()]]
+        return {TRACE_HEADER: json.dumps({'origin': self.origin, 'hops': hops})}
+
+    def finish(self):
+        """Close the current hop as the final stage."""
+        self.hops[-1][2] = time.time()
+
+    def latencies(self):
+        """Return stages, queue waits and processing times of all closed hops."""
+        stages, waits, durations = [], [], []
+        sent = self.origin
+        for stage, received, stage_sent in self.hops:
+            stages.append(stage)
+            waits.append(received - sent)
+            durations.append(stage_sent - received)
+            sent = stage_sent
+        return stages, waits, durations
+
+
+def trace_headers(trace):
+    """Return the headers passing a trace on or None if untraced."""
+    return trace.headers() if trace else None
+
+
+class TraceCollector:
+    """Traces of consumed messages, kept until the messages are settled."""
+
+    def __init__(self, stage):
+        """Set the stage name used for the hops added."""
+        self.stage = stage
+        self.traces = {}  # Keyed by delivery tag
+
+    def consumer(self, messages):
+        """Return a consumer callback continuing traces and putting messages into a queue."""
+
+        async def deliver(message):
+            if trace := Trace.receive(message, self.stage):
+                self.traces[message.delivery_tag] = trace
+            await messages.put(message)
+
+        return deliver
+
+    def pop(self, messages):
+        """Return and forget the traces of the given messages."""
+        return [self.traces.pop(message.delivery_tag) for message in messages
+                if message.delivery_tag in self.traces]
@@ -0,0 +1,214 @@
+"""Export of the stored match data into Parquet files.
+
+Tables are streamed out one patch partition at a time through server side cursors and
+written in row groups of `batch_rows` rows, keeping memory usage bound independent of the
+partition size. Files are laid out as <table>/<patch>/<from>-<to>.parquet, the range of
+ingest times in epoch milliseconds.
+
+Exports are incremental. Matches carry the time they were ingested (`match.ingested`), per
+patch the ingest time up to which matches are exported is kept as watermark and the next
+export only contains matches ingested after it. Full exports replace the directory of a
+patch instead of adding to it.
+"""
+import json
+import logging
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import ARRAY, JSON, BigInteger, Boolean, DateTime, Integer, SmallInteger, String
+
+from lol_dto import Match, PackedRunes, PartitionManager, Player, Runes, Team
+
+# Checked in order as BigInteger and SmallInteger are subclasses of Integer
+ARROW_TYPES = (
+    (BigInteger, pa.int64()),
+    (SmallInteger, pa.int16()),
+    (Integer, pa.int32()),
+    (Boolean, pa.bool_()),
+    (String, pa.string()),
+    (JSON, pa.string()),
+    (DateTime, pa.timestamp('us', tz='UTC')),
+)
+
+# Matches ingested within ($1, $2] in epoch seconds, a NULL lower bound includes all earlier
+INGESTED_RANGE = '($1::FLOAT8 IS NULL OR ingested > to_timestamp($1)) ' \
+                 'AND ingested <= to_timestamp($2)'
+
+
+def arrow_type(column_type):
+    """Return the arrow type matching an SQLAlchemy column type."""
+    if isinstance(column_type, ARRAY):
+        return pa.list_(arrow_type(column_type.item_type))
+    for sql_type, arrow in ARROW_TYPES:
+        if isinstance(column_type, sql_type):
+            return arrow
+    raise TypeError("No arrow type for %s." % column_type)
+
+
+class Exporter:
+    """Incremental Parquet export of the match tables."""
+
+    models = (Match, Team, Player, Runes, PackedRunes)
+
+    def __init__(self, directory='exports', batch_rows=50000, lag=60):
+        """Initiate logging and the table schemas.
+
+        ::param directory: Target directory of the exported files and watermarks.
+        ::param batch_rows: Rows fetched and written per row group.
+        ::param lag: Seconds an insert transaction may take at most.
+        """
+        self.logging = logging.getLogger("Exporter")
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s [Exporter] %(message)s'))
+        self.logging.addHandler(handler)
+
+        self.directory = directory
+        self.batch_rows = batch_rows
+        self.lag = lag
+        self.partitions = PartitionManager()
+        self.schemas = {
+            model.__tablename__: pa.schema([
+                (column.name, arrow_type(column.type)) for column in model.__table__.columns])
+            for model in self.models
+        }
+        # JSON is exported as text independent of the codecs set on the connection
+        self.selects = {
+            model.__tablename__: ", ".join(
+                '"%s"::TEXT' % column.name if isinstance(column.type, JSON)
+                else '"%s"' % column.name for column in model.__table__.columns)
+            for model in self.models
+        }
+
+    @property
+    def watermark_file(self):
+        """Path of the watermark file."""
+        return os.path.join(self.directory, 'ingest_watermarks.json')
+
+    def load_watermarks(self):
+        """Return the ingest time up to which each patch is exported, in epoch seconds."""
+        try:
+            with open(self.watermark_file) as file:
+                return {int(patch): ingested for patch, ingested in json.load(file).items()}
+        except FileNotFoundError:
+            return {}
+
+    def save_watermarks(self, watermarks):
+        """Persist the watermarks, replacing the previous file atomically."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.watermark_file + '.tmp', 'w+') as file:
+            json.dump(watermarks, file)
+        os.replace(self.watermark_file + '.tmp', self.watermark_file)
+
+    def patch_directory(self, table, patch):
+        """Path of the exported files of a patch."""
+        return os.path.join(self.directory, table, str(patch))
+
+    async def export(self, conn, full=False):
+        """Export all matches not yet exported.
+
+        All tables are read within one snapshot so exported files of a patch are consistent.
+        Matches are exported up to `lag` seconds before the snapshot, as later transactions
+        may not be committed yet. Patches without watermark are exported in full.
+        ::param full: Ignore the watermarks and export everything.
+        """
+        watermarks = {} if full else self.load_watermarks()
+        async with conn.transaction(isolation='repeatable_read', readonly=True):
+            high = await conn.fetchval(
+                'SELECT extract(epoch FROM now())::FLOAT8 - $1;', self.lag)
+            for patch in await self.partitions.attached(conn, 'match'):
+                low = watermarks.get(patch)
+                if low is not None and not await conn.fetchval(
+                        'SELECT EXISTS (SELECT 1 FROM %s WHERE %s);' % (
+                            self.partitions.partition_name('match', patch), INGESTED_RANGE),
+                        low, high):
+                    continue
+                for model in self.models:
+                    table = model.__tablename__
+                    rows = await self.export_table(conn, table, patch, low, high)
+                    if rows:
+                        self.logging.info("Exported %s rows of %s for patch %s.",
+                                          rows, table, patch)
+                if low is None:
+                    for model in self.models:
+                        self.replace(self.patch_directory(model.__tablename__, patch))
+                watermarks[patch] = high
+                self.save_watermarks(watermarks)
+
+    async def export_table(self, conn, table, patch, low, high):
+        """Export the rows of a patch partition within an ingest time range into one file.
+
+        Full exports (low is None) are written into a temporary directory, see replace.
+        :returns: Number of exported rows.
+        """
+        schema = self.schemas[table]
+        directory = self.patch_directory(table, patch)
+        if low is None:
+            directory += '.tmp'
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+        path = os.path.join(directory, '%d-%d.parquet' % ((low or 0) * 1000, high * 1000))
+        match_partition = self.partitions.partition_name('match', patch)
+        if table == 'match':
+            condition = INGESTED_RANGE
+        else:
+            condition = '"matchId" IN (SELECT "matchId" FROM %s WHERE %s)' % (
+                match_partition, INGESTED_RANGE)
+        query = 'SELECT %s FROM %s WHERE %s;' % (
+            self.selects[table], self.partitions.partition_name(table, patch), condition)
+        writer = None
+        rows = 0
+        buffer = []
+        try:
+            async for record in conn.cursor(query, low, high, prefetch=self.batch_rows):
+                buffer.append(record)
+                if len(buffer) >= self.batch_rows:
+                    writer = self.write(writer, path, schema, buffer)
+                    rows += len(buffer)
+                    buffer = []
+            if buffer:
+                writer = self.write(writer, path, schema, buffer)
+                rows += len(buffer)
+        finally:
+            if writer:
+                writer.close()
+        if writer:
+            os.replace(path + '.tmp', path)
+        return rows
+
+    @staticmethod
+    def replace(directory):
+        """Replace the files of a patch by its full export.
+
+        The previous directory is moved aside before the new one takes its place, readers
+        never see both the previous files and the full export.
+        """
+        previous = directory + '.old'
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(directory):
+            os.rename(directory, previous)
+        os.rename(directory + '.tmp', directory)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    def write(self, writer, path, schema, records):
+        """Write records as row group, opening the file on the first call.
+
+        The file is written under a temporary name until the export of the table is done.
+        """
+        if not writer:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer = pq.ParquetWriter(
+                path + '.tmp', schema, compression='zstd', use_dictionary=True)
+        writer.write_table(self.to_table(schema, records))
+        return writer
+
+    @staticmethod
+    def to_table(schema, records):
+        """Convert a list of records into a columnar arrow table."""
+        return pa.Table.from_arrays([
+            pa.array([record[index] for record in records], type=field.type)
+            for index, field in enumerate(schema)], schema=schema)
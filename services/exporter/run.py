@@ -0,0 +1,39 @@
+import asyncio
+import os
+import signal
+import sys
+
+import asyncpg
+import uvloop
+from exporter import Exporter
+
+uvloop.install()
+
+
+async def main(full):
+    exporter = Exporter(batch_rows=int(os.environ.get('EXPORT_BATCH_ROWS', 50000)))
+    interval = int(os.environ.get('EXPORT_INTERVAL', 0))  # Seconds between exports, 0 runs once
+    stopped = asyncio.Event()
+
+    def shutdown_handler():
+        stopped.set()
+
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, shutdown_handler)
+
+    while not stopped.is_set():
+        conn = await asyncpg.connect("postgresql://postgres@postgres/raw")
+        try:
+            await exporter.export(conn, full=full)
+        finally:
+            await conn.close()
+        full = False
+        if not interval:
+            return
+        try:
+            await asyncio.wait_for(stopped.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main(full='--full' in sys.argv[1:]))
@@ -2,13 +2,15 @@
 import asyncio
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
-import aiohttp
+from drain import drain
 from exceptions import RatelimitException, NotFoundException, Non200Exception
+from fetcher import Fetcher, key_headers
 from rabbit_manager_slim import RabbitManager
 from rank_manager import RankManager
 from repeat_marker import RepeatMarker
+from tracing import Trace, trace_headers
 
 tiers = {
     "IRON": 0,
@@ -27,31 +29,48 @@ rank = {
     "II": 2,
     "I": 3}
 
+MAX_PRIORITY = 9  # Highest priority declared on the queues, see structural_creator
+
+
+def priority(ranking):
+    """Return the message priority of a player by ranking, one step per 300 points.
+
+    Iron IV is 0, Gold IV 4, Diamond IV 6, Diamond I 7 and Master and above 9.
+    """
+    return min(MAX_PRIORITY, ranking // 300)
+
 
 class Service:  # pylint: disable=R0902
     """Core service worker object."""
 
-    def __init__(self):
-        """Initiate sync elements on creation."""
-        self.logging = logging.getLogger("LeagueRankings")
+    def __init__(self, server, shared):
+        """Initiate sync elements on creation.
+
+        ::param server: Server served by this instance.
+        ::param shared: Connections, ledger and profiler shared between servers, see regions.py.
+        """
+        self.logging = logging.getLogger("LeagueRankings_%s" % server)
         self.logging.setLevel(logging.INFO)
         handler = logging.StreamHandler()
         handler.setLevel(logging.INFO)
         handler.setFormatter(
-            logging.Formatter('%(asctime)s [Subscriber] %(message)s'))
+            logging.Formatter('%%(asctime)s [LeagueRankings %s] %%(message)s' % server))
         self.logging.addHandler(handler)
 
-        self.server = os.environ['SERVER']
+        self.server = server
+        self.shared = shared
         self.url = f"http://{self.server.lower()}.api.riotgames.com/lol/" + \
                    "league-exp/v4/entries/RANKED_SOLO_5x5/%s/%s?page=%s"
-        self.rankmanager = RankManager()
+        self.rankmanager = RankManager(server)
         self.empty = False
         self.next_page = 1
         self.stopped = False
-        self.marker = RepeatMarker()
-        self.retry_after = datetime.now()
+        self.workers = []
+        self.marker = RepeatMarker(server=server)
+        self.fetcher = Fetcher(server, 'league-exp-v4', ledger=shared.ledger)
 
-        self.rabbit = RabbitManager(exchange="RANKED")
+        self.rabbit = RabbitManager(exchange="RANKED", server=server)
+        self.trace_sample = float(os.environ.get('TRACE_SAMPLE', 0))  # Share of traced tasks
 
         asyncio.run(self.marker.build(
             "CREATE TABLE IF NOT EXISTS match_history("
@@ -69,13 +88,14 @@ class Service:  # pylint: disable=R0902
         """
         await self.marker.connect()
         await self.rankmanager.init()
-        await self.rabbit.init()
+        await self.rabbit.init(self.shared.connection)
+        await self.fetcher.init()
 
     async def async_worker(self, tier, division):
 
         failed = None
         while (not self.empty or failed) and not self.stopped:
-            if (delay := (self.retry_after - datetime.now()).total_seconds()) > 0:
+            if (delay := (self.fetcher.retry_after - datetime.now()).total_seconds()) > 0:
                 await asyncio.sleep(delay)
 
             while self.rabbit.blocked and not self.stopped:
@@ -90,55 +110,26 @@ class Service:  # pylint: disable=R0902
             else:
                 page = failed
                 failed = None
-            async with aiohttp.ClientSession() as session:
-                try:
-                    content = await self.fetch(session, url=self.url % (
-                        tier, division, page))
-                    if len(content) == 0:
-                        self.logging.info("Page %s is empty.", page)
-                        self.empty = True
-                        return
-                    await self.process_task(content)
-                except (RatelimitException, Non200Exception):
-                    failed = page
-                except NotFoundException:
+            try:
+                # League pages are not pinned, the proxy sends them with the key with most headroom
+                content, key = await self.fetcher.fetch_keyed(self.shared.session, url=self.url % (
+                    tier, division, page),
+                    classify=lambda content: 'useful' if content else 'empty')
+                if len(content) == 0:
+                    self.logging.info("Page %s is empty.", page)
                     self.empty = True
-
-    async def fetch(self, session, url):
-        """Execute call to external target using the proxy server.
-
-        Receives aiohttp session as well as url to be called. Executes the request and returns
-        either the content of the response as json or raises an exeption depending on response.
-        :param session: The aiohttp Clientsession used to execute the call.
-        :param url: String url ready to be requested.
-
-        :returns: Request response as dict.
-
-        :raises RatelimitException: on 429 or 430 HTTP Code.
-        :raises NotFoundException: on 404 HTTP Code.
-        :raises Non200Exception: on any other non 200 HTTP Code.
-        """
-        try:
-            async with session.get(url, proxy="http://lightshield_proxy_%s:8000" % self.server.lower()) as response:
-                await response.text()
-        except aiohttp.ClientConnectionError as err:
-            self.logging.info("Error %s", err)
-            raise Non200Exception()
-        if response.status in [429, 430]:
-            if "Retry-After" in response.headers:
-                delay = int(response.headers['Retry-After'])
-                self.retry_after = datetime.now() + timedelta(seconds=delay)
-            raise RatelimitException()
-        if response.status == 404:
-            raise NotFoundException()
-        if response.status != 200:
-            raise Non200Exception()
-        return await response.json(content_type=None)
-
-    async def process_task(self, content) -> None:
+                    return
+                await self.process_task(content, key)
+            except (RatelimitException, Non200Exception):
+                failed = page
+            except NotFoundException:
+                self.empty = True
+
+    async def process_task(self, content, key=None) -> None:
         """Process the received list of summoner.
 
         Check for changes that would warrent it be sent on.
+        The summonerIds are passed on with the index of the API key that returned them.
          """
         for entry in content:
             matches_local = entry['wins'] + entry['losses']
@@ -149,29 +140,45 @@ class Service:  # pylint: disable=R0902
 
             if matches and matches == matches_local:
                 return
-            await self.marker.execute_write(
-                'UPDATE match_history SET matches = %s WHERE summonerId = "%s";' % (
-                    matches_local,
-                    entry['summonerId']))
 
             ranking = tiers[entry['tier']] * 400 + rank[entry['rank']] * 100 + entry['leaguePoints']
 
+            trace = Trace.start('league_rankings', self.trace_sample)
             await self.rabbit.add_task([
                 entry['summonerId'],
                 ranking,
                 entry['wins'],
                 entry['losses']
-            ])
+            ], headers=key_headers(key, trace_headers(trace)), priority=priority(ranking),
+                shard_key=entry['summonerId'])
+            # Marked once passed on, a page cut off by the drain is passed on again
+            await self.marker.execute_write(
+                'UPDATE match_history SET matches = %s WHERE summonerId = "%s";' % (
+                    matches_local,
+                    entry['summonerId']))
 
-    async def run(self):
-        """Override the default run method due to special case.
+    async def crawl(self):
+        """Crawl the tier/rank combinations.
 
         Worker are started and stopped after each tier/rank combination.
         """
-        await self.init()
         while not self.stopped:
             tier, division = await self.rankmanager.get_next()
             self.empty = False
             self.next_page = 1
-            await asyncio.gather(*[asyncio.create_task(self.async_worker(tier, division)) for i in range(5)])
-            await self.rankmanager.update(key=(tier, division))
+            self.workers = [asyncio.create_task(self.async_worker(tier, division)) for i in range(5)]
+            await asyncio.gather(*self.workers)
+            if not self.stopped:  # Interrupted combinations are repeated after the restart
+                await self.rankmanager.update(key=(tier, division))
+
+    async def run(self):
+        """Override the default run method due to special case."""
+        await self.init()
+        crawler = asyncio.create_task(self.crawl())
+        while not self.stopped:
+            await asyncio.sleep(1)
+        await drain(None, lambda: self.workers, self.logging)
+        crawler.cancel()
+        await self.rabbit.close()
+        await self.marker.close()
+        await self.fetcher.close()
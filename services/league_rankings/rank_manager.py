@@ -25,23 +25,27 @@ divisions = [
 class RankManager:
     """Ordering and Management of ranking updates."""
 
-    def __init__(self):
-        """Initiate logging."""
-        self.logging = logging.getLogger("RankManager")
+    def __init__(self, server):
+        """Initiate logging.
+
+        ::param server: Server the rankings are crawled for.
+        """
+        self.logging = logging.getLogger("RankManager_%s" % server)
         self.logging.setLevel(logging.INFO)
         handler = logging.StreamHandler()
         handler.setLevel(logging.INFO)
         handler.setFormatter(
-            logging.Formatter('%(asctime)s [RankManager] %(message)s'))
+            logging.Formatter('%%(asctime)s [RankManager %s] %%(message)s' % server))
         self.logging.addHandler(handler)
 
+        self.server = server
         self.ranks = None
         self.update_interval = int(os.environ['UPDATE_INTERVAL'])
 
     async def init(self):
         """Open or create the ranking_cooldown tracking sheet."""
         try:
-            self.ranks = json.loads(open(f"configs/ranking_cooldown_{os.environ['SERVER']}.json", "r+").read())
+            self.ranks = json.loads(open(f"configs/ranking_cooldown_{self.server}.json", "r+").read())
             self.logging.info("Loaded data file.")
         except FileNotFoundError:
             self.logging.info("File not found. Recreating.")
@@ -57,7 +61,7 @@ class RankManager:
 
     async def save_to_file(self):
         """Save the current stats to the tracking file."""
-        with open(f"configs/ranking_cooldown_{os.environ['SERVER']}.json", "w+") as datafile:
+        with open(f"configs/ranking_cooldown_{self.server}.json", "w+") as datafile:
             datafile.write(json.dumps(self.ranks))
 
     async def get_next(self):
@@ -1,20 +1,14 @@
 import asyncio
-import signal
 
 import uvloop
 from logic import Service
+from regions import Shared
 
 uvloop.install()
 
 if __name__ == "__main__":
-    service = Service()
-
-
-    def shutdown_handler():
-        service.shutdown()
-
-
-    signal.signal(signal.SIGTERM, shutdown_handler)
-
-    asyncio.run(service.run())
-    service.rabbit.shutdown()
+    shared = Shared("LeagueRankings")
+    services = [Service(server, shared) for server in shared.servers]
+    asyncio.run(shared.run(services))
+    for service in services:
+        service.rabbit.shutdown()
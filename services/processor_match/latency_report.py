@@ -0,0 +1,32 @@
+"""Print per stage latencies of the traced tasks, see tracing.py of the base image.
+
+Usage: python latency_report.py [hours]
+
+Covers the traces finished within the last `hours` hours, 24 by default.
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from permanent_db import PermanentDB
+
+from lol_dto.traces import latency_report
+
+
+async def main(hours):
+    permanent = PermanentDB()
+    await permanent.init()
+    async with permanent.pool.acquire() as conn:
+        rows = await latency_report(conn, datetime.now(timezone.utc) - timedelta(hours=hours))
+    print("%-20s %8s %10s %10s %10s %10s" % (
+        "stage", "traces", "wait p50", "wait p95", "proc p50", "proc p95"))
+    for row in rows:
+        print("%-20s %8s %10s %10s %10s %10s" % (
+            row['stage'], row['traces'], *[
+                '-' if row[key] is None else '%.2fs' % row[key]
+                for key in ('wait_p50', 'wait_p95', 'duration_p50', 'duration_p95')]))
+    await permanent.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 24))
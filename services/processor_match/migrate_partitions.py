@@ -0,0 +1,31 @@
+"""Move tables created before partitioning into the partitioned match tables.
+
+Usage: python migrate_partitions.py [--drop]
+
+--drop drops the old tables once their content is copied.
+"""
+import asyncio
+import sys
+
+import asyncpg
+from permanent_db import PermanentDB
+
+from lol_dto import migrate_partitioning, rename_unpartitioned
+
+
+async def main(drop):
+    conn = await asyncpg.connect(PermanentDB.dsn)
+    for table in await rename_unpartitioned(conn):
+        print("Renamed %s to %s_unpartitioned." % (table, table))
+    await conn.close()
+    permanent = PermanentDB()
+    await permanent.init()
+    async with permanent.pool.acquire() as conn:
+        copied = await migrate_partitioning(conn, permanent.partitions, drop=drop)
+    for table, count in copied.items():
+        print("Table %s: copied %s rows." % (table, count))
+    await permanent.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(drop='--drop' in sys.argv[1:]))
@@ -0,0 +1,26 @@
+"""Migrate the runes table into the packed runes storage.
+
+Usage: python migrate_runes.py [--drop]
+
+--drop truncates each patch partition of the runes table once it is migrated.
+"""
+import asyncio
+import sys
+
+from permanent_db import PermanentDB
+
+from lol_dto import migrate_runes
+
+
+async def main(drop):
+    permanent = PermanentDB()
+    await permanent.init()
+    async with permanent.pool.acquire() as conn:
+        migrated = await migrate_runes(conn, permanent.partitions, drop=drop)
+    for patch, count in migrated.items():
+        print("Patch %s: packed runes of %s participants." % (patch, count))
+    await permanent.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(drop='--drop' in sys.argv[1:]))
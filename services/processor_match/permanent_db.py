@@ -1,14 +1,47 @@
+import json
+import os
+
+import asyncpg
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from lol_dto import (
-    Base)
+    Aggregator, Base, IdentifierCache, Match, MatchTransformer, PartitionManager,
+    create_unpacked_view, migrate)
 
 
 class PermanentDB:
     base_url = "postgresql+asyncpg://postgres@postgres/raw"
+    dsn = "postgresql://postgres@postgres/raw"
 
     def __init__(self):
         self.engine = None
+        self.pool = None
+        # `rows` or `packed`, see lol_dto/runes.py
+        self.transformer = MatchTransformer(
+            runes_storage=os.environ.get('RUNES_STORAGE', 'rows'))
+        # Number of most recent patches kept attached, 0 keeps all
+        self.partitions = PartitionManager(retention=int(os.environ.get('PARTITION_RETENTION', 0)))
+        self.aggregator = Aggregator(self.transformer)
+        self.identifiers = IdentifierCache(size=int(os.environ.get('IDENTIFIER_CACHE', 100000)))
+        # Conflict ignoring inserts keep reloading an already committed batch idempotent
+        self.insert_queries = {
+            table: 'INSERT INTO %s (%s) VALUES (%s) ON CONFLICT DO NOTHING;' % (
+                table,
+                ", ".join('"%s"' % column for column in columns),
+                ", ".join('$%s' % (index + 1) for index in range(len(columns))))
+            for table, columns in self.transformer.columns.items()
+        }
+        # Matches are inserted column wise, returning the matchIds not already stored
+        match_types = {column.name: column.type.compile(dialect=postgresql.dialect())
+                       for column in Match.__table__.columns}
+        match_columns = self.transformer.columns['match']
+        self.match_query = (
+            'INSERT INTO match (%s) SELECT * FROM unnest(%s) '
+            'ON CONFLICT DO NOTHING RETURNING "matchId";' % (
+                ", ".join('"%s"' % column for column in match_columns),
+                ", ".join('$%s::%s[]' % (index + 1, match_types[column])
+                          for index, column in enumerate(match_columns))))
 
     async def init(self):
         self.engine = create_async_engine(
@@ -17,3 +50,34 @@ class PermanentDB:
 
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+
+        self.pool = await asyncpg.create_pool(self.dsn, init=self.init_connection)
+        async with self.pool.acquire() as conn:
+            await migrate(conn, self.partitions)
+            await create_unpacked_view(conn)
+
+    @staticmethod
+    async def init_connection(conn):
+        await conn.set_type_codec(
+            'json', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+    async def insert(self, conn, rows):
+        """Insert transformed rows, parents first, and add them to the aggregate tables.
+
+        Has to be run within a transaction. Matches already stored, e.g. committed by another
+        processor in the meantime, are skipped with all their rows, so each match is only
+        aggregated once.
+        :returns: Number of inserted matches.
+        """
+        if not rows['match']:
+            return 0
+        inserted = {match_id for (match_id,) in await conn.fetch(
+            self.match_query, *[list(column) for column in zip(*rows['match'])])}
+        if len(inserted) < len(rows['match']):
+            rows = self.transformer.exclude(
+                rows, {row[0] for row in rows['match']} - inserted)
+        for table in self.transformer.tables[1:]:
+            if rows[table]:
+                await conn.executemany(self.insert_queries[table], rows[table])
+        await self.aggregator.upsert(conn, rows)
+        return len(inserted)
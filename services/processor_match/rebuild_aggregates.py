@@ -0,0 +1,25 @@
+"""Recompute the aggregate tables from the raw match tables.
+
+Usage: python rebuild_aggregates.py [patch]
+
+Without a patch, aggregates of all patches are rebuilt.
+"""
+import asyncio
+import sys
+
+from permanent_db import PermanentDB
+
+from lol_dto.aggregates import rebuild
+
+
+async def main(patch):
+    permanent = PermanentDB()
+    await permanent.init()
+    async with permanent.pool.acquire() as conn:
+        await rebuild(conn, patch)
+    print("Rebuilt aggregates%s." % (" of patch %s" % patch if patch else ""))
+    await permanent.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,31 @@
+"""Decoding and transformation of match messages, run inline or inside a process pool.
+
+Functions are kept on module level so they can be pickled for the worker processes.
+Each worker compiles its own transformer once on startup.
+"""
+import os
+import pickle
+
+from lol_dto import MatchTransformer
+
+transformer = None
+
+
+def init_worker():
+    """Compile the transformer in the current process."""
+    global transformer  # pylint: disable=W0603
+    transformer = MatchTransformer(runes_storage=os.environ.get('RUNES_STORAGE', 'rows'))
+
+
+def transform_bodies(bodies):
+    """Decode message bodies and transform them into ready to load rows.
+
+    Duplicates within the bodies are dropped.
+    """
+    if transformer is None:
+        init_worker()
+    matches = {}
+    for body in bodies:
+        task = pickle.loads(body)
+        matches[task['gameId']] = task
+    return transformer.transform_many(matches.values())
@@ -0,0 +1,92 @@
+"""Loading of summoner batches into the summoner table.
+
+Batches are sent through binary COPY into a temporary staging table and merged into the
+summoner table with a single upsert. Each pooled connection holds its own staging table,
+which is emptied on commit. Before the merge, changed summoner are appended to the rank
+history (see lol_dto/rank_history.py).
+"""
+import asyncpg
+
+from lol_dto.traces import insert_traces
+
+STAGING_TABLE = '''
+CREATE TEMPORARY TABLE IF NOT EXISTS summoner_staging
+    (LIKE summoner INCLUDING DEFAULTS)
+    ON COMMIT DELETE ROWS;
+'''
+
+MERGE_QUERY = '''
+INSERT INTO summoner (account_key, puuid_key, rank, wins, losses)
+SELECT account_key, puuid_key, rank, wins, losses FROM summoner_staging
+ON CONFLICT (puuid_key)
+DO
+    UPDATE SET account_key = EXCLUDED.account_key,
+               rank = EXCLUDED.rank,
+               wins = EXCLUDED.wins,
+               losses = EXCLUDED.losses;
+'''
+
+
+class SummonerLoader:
+    """Merge summoner batches into the summoner table using a connection pool."""
+
+    columns = ('account_key', 'puuid_key', 'rank', 'wins', 'losses')
+
+    def __init__(self, dsn, identifiers, history, pool_size=5):
+        """Set connection details.
+
+        ::param identifiers: IdentifierCache resolving account ids and puuids.
+        ::param history: HistoryManager of the rank history table.
+        """
+        self.dsn = dsn
+        self.identifiers = identifiers
+        self.history = history
+        self.pool_size = pool_size
+        self.pool = None
+
+    async def init(self):
+        """Create the connection pool."""
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=1, max_size=self.pool_size, init=self.init_connection)
+
+    @staticmethod
+    async def init_connection(conn):
+        """Create the staging table of a new connection."""
+        await conn.execute(STAGING_TABLE)
+
+    async def close(self):
+        """Close the connection pool."""
+        if self.pool:
+            await self.pool.close()
+
+    async def load(self, tasks):
+        """Upsert summoner tasks of the form [accountId, puuid, rank, wins, losses].
+
+        Later tasks of the same puuid replace earlier ones.
+
+        :returns: Number of summoner loaded and number of those changed.
+        """
+        tasks = list(tasks)
+        async with self.pool.acquire() as conn:
+            await self.history.ensure(conn)
+            keys = await self.identifiers.resolve(
+                conn, [key for task in tasks for key in task[:2]])
+            records = {}
+            for account_id, puuid, rank, wins, losses in tasks:
+                records[keys[puuid]] = (keys[account_id], keys[puuid], rank, wins, losses)
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    'summoner_staging', records=list(records.values()), columns=self.columns)
+                changed = await self.history.record(conn)
+                await conn.execute(MERGE_QUERY)
+        return len(records), changed
+
+    async def store_traces(self, traces):
+        """Store finished traces, see tracing.py."""
+        async with self.pool.acquire() as conn:
+            await insert_traces(conn, traces)
+
+    async def maintain(self):
+        """Apply retention and downsampling to the rank history."""
+        async with self.pool.acquire() as conn:
+            await self.history.maintain(conn)
@@ -0,0 +1,122 @@
+"""Sliding window rate limits as reported by the Riot API headers.
+
+Limits are given as `<count>:<seconds>` pairs, e.g. `X-App-Rate-Limit: 20:1,100:120`. Each
+pair is enforced by a window holding the send times of the requests within the last
+`seconds`, so a request is sent as soon as the oldest request of a full window leaves it.
+"""
+from collections import deque
+
+
+def method_key(path):
+    """Return the method a request path is limited by.
+
+    Method limits apply per endpoint method, e.g. `/lol/match/v4/matchlists/by-account/<id>`
+    is limited as `match-v4/matchlists/by-account` independent of the id requested.
+    """
+    segments = path.strip('/').split('/')
+    if len(segments) < 4:
+        return '/'.join(segments)
+    key = ['%s-%s' % (segments[1], segments[2]), segments[3]]
+    if len(segments) > 4 and segments[4].startswith('by-'):
+        key.append(segments[4])
+    return '/'.join(key)
+
+
+def parse_limits(header):
+    """Return the (count, seconds) pairs of a rate limit header."""
+    pairs = []
+    for pair in header.split(','):
+        count, seconds = pair.strip().split(':')
+        pairs.append((int(count), int(seconds)))
+    return pairs
+
+
+class SlidingWindow:
+    """Single `count` per `seconds` limit."""
+
+    def __init__(self, count, seconds, margin=0):
+        """Set the limit.
+
+        ::param margin: Seconds requests are kept in the window beyond its length, covering
+        the delay between sending a request and the API counting it.
+        """
+        self.count = count
+        self.seconds = seconds + margin
+        self.sent = deque()
+
+    def expire(self, now):
+        """Forget requests that left the window."""
+        while self.sent and self.sent[0] <= now - self.seconds:
+            self.sent.popleft()
+
+    def wait(self, now):
+        """Return the seconds until another request can be sent."""
+        self.expire(now)
+        if len(self.sent) < self.count:
+            return 0
+        return self.sent[len(self.sent) - self.count] + self.seconds - now
+
+    def add(self, now):
+        """Register a sent request."""
+        self.sent.append(now)
+
+    def sync(self, reported, now):
+        """Align the window with the count reported by the API.
+
+        Requests sent by other clients or before a restart count against the same limit, so
+        the window is padded with requests at `now` up to the reported count.
+        """
+        self.expire(now)
+        for _ in range(reported - len(self.sent)):
+            self.sent.append(now)
+
+
+class RateLimit:
+    """All windows of a single limit scope, either the application or a method."""
+
+    def __init__(self, header, margin=0):
+        """Create windows from a rate limit header."""
+        self.header = header
+        self.margin = margin
+        self.windows = [SlidingWindow(count, seconds, margin)
+                        for count, seconds in parse_limits(header)]
+        self.blocked_until = 0  # Set by 429 responses carrying a Retry-After
+
+    def wait(self, now):
+        """Return the seconds until another request can be sent."""
+        return max([self.blocked_until - now] + [window.wait(now) for window in self.windows])
+
+    def add(self, now):
+        """Register a sent request in all windows."""
+        for window in self.windows:
+            window.add(now)
+
+    def usage(self, now):
+        """Return the highest share of a window currently used."""
+        for window in self.windows:
+            window.expire(now)
+        return max([len(window.sent) / window.count for window in self.windows] + [0])
+
+    def update(self, header, counts, now):
+        """Apply the limit and count headers of a response.
+
+        Windows are replaced if the API reports different limits, keeping the requests sent.
+        """
+        if header and header != self.header:
+            sent = self.windows[0].sent if self.windows else deque()
+            self.header = header
+            self.windows = [SlidingWindow(count, seconds, self.margin)
+                            for count, seconds in parse_limits(header)]
+            for window in self.windows:
+                window.sent = deque(sent)
+                window.expire(now)
+        if counts:
+            reported = dict((seconds + self.margin, count)
+                            for count, seconds in parse_limits(counts))
+            for window in self.windows:
+                if window.seconds in reported:
+                    window.sync(reported[window.seconds], now)
+
+    def block(self, seconds, now):
+        """Block the scope after a 429 response."""
+        self.blocked_until = max(self.blocked_until, now + seconds)
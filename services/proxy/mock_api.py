@@ -0,0 +1,83 @@
+"""Local stand in for the Riot API to run the proxy against.
+
+Enforces an application and per method limits per API key the way the API does, reporting
+them in the rate limit headers and answering calls above a limit with 429 and a Retry-After
+header.
+Successful calls return an empty list after `latency` seconds.
+
+Usage: python mock_api.py
+Settings: MOCK_APP_LIMIT, MOCK_METHOD_LIMIT, MOCK_LATENCY and MOCK_PORT.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+
+from aiohttp import web
+from limits import RateLimit, method_key
+
+
+class MockApi:
+    """Rate limited API answering every call."""
+
+    def __init__(self, app_limit='20:1,100:120', method_limit='50:10', latency=0.05):
+        """Set limits and response latency."""
+        self.app_limit = app_limit
+        self.apps = {}
+        self.method_limit = method_limit
+        self.methods = {}
+        self.latency = latency
+        self.calls = 0
+        self.limited = 0
+
+    @staticmethod
+    def counts(limit):
+        """Return the count header of a limit."""
+        return ','.join('%s:%s' % (len(window.sent), window.seconds) for window in limit.windows)
+
+    async def handle(self, request):
+        """Answer a call or reject it if a limit is exceeded."""
+        if 'X-Riot-Token' not in request.headers:
+            return web.Response(status=401)
+        self.calls += 1
+        now = time.monotonic()
+        token = request.headers['X-Riot-Token']
+        app = self.apps.setdefault(token, RateLimit(self.app_limit))
+        method = self.methods.setdefault(
+            (token, method_key(request.path)), RateLimit(self.method_limit))
+        headers = {
+            'X-App-Rate-Limit': app.header,
+            'X-Method-Rate-Limit': method.header,
+        }
+        for limit, scope in ((app, 'application'), (method, 'method')):
+            if (wait := limit.wait(now)) > 0:
+                self.limited += 1
+                headers.update({
+                    'X-App-Rate-Limit-Count': self.counts(app),
+                    'X-Method-Rate-Limit-Count': self.counts(method),
+                    'X-Rate-Limit-Type': scope,
+                    'Retry-After': str(math.ceil(wait)),
+                })
+                return web.Response(status=429, headers=headers)
+        app.add(now)
+        method.add(now)
+        headers.update({
+            'X-App-Rate-Limit-Count': self.counts(app),
+            'X-Method-Rate-Limit-Count': self.counts(method),
+        })
+        await asyncio.sleep(self.latency)
+        return web.Response(text=json.dumps([]), headers=headers, content_type='application/json')
+
+    def application(self):
+        """Return the web application answering all requests."""
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        return app
+
+
+if __name__ == "__main__":
+    api = MockApi(app_limit=os.environ.get('MOCK_APP_LIMIT', '20:1,100:120'),
+                  method_limit=os.environ.get('MOCK_METHOD_LIMIT', '50:10'),
+                  latency=float(os.environ.get('MOCK_LATENCY', 0.05)))
+    web.run_app(api.application(), port=int(os.environ.get('MOCK_PORT', 8000)))
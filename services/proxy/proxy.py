@@ -0,0 +1,297 @@
+"""Rate limiting forward proxy between the services and the Riot API.
+
+The services send their API calls through the proxy (see fetcher.py), the proxy adds an
+API key and only forwards a call once both the application limit and the limit of the
+called method allow it. Limits are taken from the `X-App-Rate-Limit` and
+`X-Method-Rate-Limit` response headers and the windows are synced to the reported counts,
+see limits.py. Until the limits of a method are known only one call of it is in flight.
+
+Several API keys can be given, each with its own limits. A call is sent with the key having
+the most headroom left on the called method. Encrypted summoner and account ids are only
+valid with the key that returned them, so every response names its key in the `x-key`
+header and calls carrying that header are pinned to the named key.
+
+Waiting calls are queued per method and pinned key and released round robin over the
+queues, so a busy endpoint can not starve the others of the shared application limit. Calls
+waiting longer than `max_wait` are answered with 430 and a Retry-After header without
+reaching the API.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+
+import aiohttp
+from aiohttp import web
+from limits import RateLimit, method_key
+
+FORWARDED_HEADERS = ('Content-Type', 'Retry-After')
+KEY_HEADER = 'x-key'
+
+
+class ApiKey:
+    """Single API key with its application and method limits."""
+
+    def __init__(self, index, key, app_limit, margin):
+        """Set the key and the application limit used until one is reported.
+
+        ::param index: Position of the key in the pool, named in the `x-key` header.
+        ::param margin: Seconds added to every window, see limits.SlidingWindow.
+        """
+        self.index = index
+        self.key = key
+        self.margin = margin
+        self.app = RateLimit(app_limit, margin)
+        self.methods = {}  # Method limits, added once reported
+        self.in_flight = Counter()
+
+    def wait(self, method, now):
+        """Return the seconds until a call of the method may be sent, None if unknown."""
+        if method in self.methods:
+            return max(self.app.wait(now), self.methods[method].wait(now))
+        return None if self.in_flight[method] else self.app.wait(now)
+
+    def headroom(self, method, now):
+        """Return the share of the most used window left for a call of the method."""
+        usage = self.app.usage(now)
+        if method in self.methods:
+            usage = max(usage, self.methods[method].usage(now))
+        return 1 - usage
+
+    def add(self, method, now):
+        """Register a call sent."""
+        self.app.add(now)
+        if method in self.methods:
+            self.methods[method].add(now)
+        self.in_flight[method] += 1
+
+    def update(self, method, status, headers, now):
+        """Apply the limits and counts reported with a response.
+
+        :returns: Seconds the key is blocked for if the response is a 429, else None.
+        """
+        self.app.update(headers.get('X-App-Rate-Limit'), headers.get('X-App-Rate-Limit-Count'), now)
+        if method not in self.methods and 'X-Method-Rate-Limit' in headers:
+            self.methods[method] = RateLimit(headers['X-Method-Rate-Limit'], self.margin)
+        if method in self.methods:
+            self.methods[method].update(
+                headers.get('X-Method-Rate-Limit'), headers.get('X-Method-Rate-Limit-Count'), now)
+        if status != 429:
+            return None
+        retry_after = int(headers.get('Retry-After', 1))
+        if headers.get('X-Rate-Limit-Type') == 'application':
+            self.app.block(retry_after, now)
+        elif method in self.methods:
+            self.methods[method].block(retry_after, now)
+        return retry_after
+
+
+class Proxy:
+    """Queue, limit and forward API calls over a pool of keys."""
+
+    def __init__(self, api_keys, upstream, app_limit, max_wait=10, margin=0.1):
+        """Set upstream and initial limits.
+
+        ::param api_keys: List of API keys calls are distributed over.
+        ::param upstream: Base url the calls are forwarded to, `%s` is replaced by the host
+        called, e.g. `https://%s`.
+        ::param app_limit: Application limit applied until the API reports one, e.g.
+        `20:1,100:120`.
+        ::param max_wait: Seconds a call is queued before it is rejected.
+        ::param margin: Seconds added to every window as the API counts calls on arrival.
+        """
+        self.logging = logging.getLogger("Proxy")
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s [Proxy] %(message)s'))
+        self.logging.addHandler(handler)
+
+        self.keys = [ApiKey(index, key, app_limit, margin) for index, key in enumerate(api_keys)]
+        self.upstream = upstream
+        self.max_wait = max_wait
+        # Waiting calls per (method, pinned key index or None), in round robin order
+        self.queues = OrderedDict()
+        self.wakeup = None
+        self.session = None
+
+        self.responses = Counter()  # Keyed by (method, status)
+        self.sent = Counter()  # Keyed by key index
+        self.rejected = Counter()
+        self.waited = Counter()
+        self.released = Counter()
+
+    async def init(self):
+        """Open the upstream session and start releasing calls."""
+        self.wakeup = asyncio.Event()
+        self.session = aiohttp.ClientSession()
+        asyncio.create_task(self.run())
+
+    async def close(self):
+        """Close the upstream session."""
+        await self.session.close()
+
+    def target(self, request):
+        """Return the upstream url of a request."""
+        base = self.upstream % request.host if '%s' in self.upstream else self.upstream
+        return base.rstrip('/') + request.path_qs
+
+    def pinned(self, request):
+        """Return the key index a request is pinned to, None if any key may be used."""
+        index = request.headers.get(KEY_HEADER)
+        if index is None:
+            return None
+        if index.isdigit() and int(index) < len(self.keys):
+            return int(index)
+        self.logging.info("Unknown key %s requested, using any key.", index)
+        return None
+
+    async def handle(self, request):
+        """Forward a call once the limits of a key allow it."""
+        method = method_key(request.path)
+        if not (key := await self.acquire(method, self.pinned(request))):
+            self.rejected[method] += 1
+            return web.Response(status=430, headers={'Retry-After': '1'})
+        try:
+            async with self.session.get(
+                    self.target(request), headers={'X-Riot-Token': key.key}) as response:
+                body = await response.read()
+                headers = response.headers
+                status = response.status
+        except aiohttp.ClientError as err:
+            self.logging.info("Upstream error %s", err)
+            self.responses[(method, 502)] += 1
+            return web.Response(status=502)
+        finally:
+            key.in_flight[method] -= 1
+            self.wakeup.set()
+        if (retry_after := key.update(method, status, headers, time.monotonic())) is not None:
+            self.logging.info("429 on %s with key %s (%s), blocking for %ss.", method, key.index,
+                              headers.get('X-Rate-Limit-Type', 'service'), retry_after)
+        self.responses[(method, status)] += 1
+        forwarded = {name: value for name, value in headers.items()
+                     if name in FORWARDED_HEADERS or name.lower().startswith('x-')}
+        forwarded[KEY_HEADER] = str(key.index)
+        return web.Response(status=status, body=body, headers=forwarded)
+
+    async def acquire(self, method, pin=None):
+        """Queue a call until it is released, returns the key to use or None if rejected."""
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault((method, pin), deque()).append((future, time.monotonic()))
+        self.wakeup.set()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Released while the caller was cancelled, the call is never sent
+            if future.done() and not future.cancelled() and (key := future.result()):
+                key.in_flight[method] -= 1
+                self.wakeup.set()
+            raise
+
+    def select(self, method, pin, now):
+        """Return the key a call may be sent with now and the seconds to wait otherwise.
+
+        Unpinned calls use the key with the most headroom among the keys free to send.
+        """
+        candidates = [self.keys[pin]] if pin is not None else self.keys
+        best, delays = None, []
+        for key in candidates:
+            if (wait := key.wait(method, now)) is None:
+                continue
+            if wait > 0:
+                delays.append(wait)
+            elif not best or key.headroom(method, now) > best.headroom(method, now):
+                best = key
+        return best, min(delays) if delays else None
+
+    def release(self):
+        """Release all calls the limits allow, returning the seconds until the next check.
+
+        Returns None if no call can be released before a response is received.
+        """
+        now = time.monotonic()
+        delays = []
+        for queue in self.queues.values():
+            while queue and (queue[0][0].done() or queue[0][1] < now - self.max_wait):
+                future, _ = queue.popleft()
+                if not future.done():
+                    future.set_result(None)
+            if queue:
+                delays.append(queue[0][1] + self.max_wait - now)
+        released = True
+        while released:
+            released = False
+            for (method, pin), queue in self.queues.items():
+                while queue and queue[0][0].done():  # Callers cancelled while queued
+                    queue.popleft()
+                if not queue:
+                    continue
+                key, delay = self.select(method, pin, now)
+                if not key:
+                    if delay:
+                        delays.append(delay)
+                    continue
+                future, queued = queue.popleft()
+                future.set_result(key)
+                key.add(method, now)
+                self.sent[key.index] += 1
+                self.waited[method] += now - queued
+                self.released[method] += 1
+                self.queues.move_to_end((method, pin))
+                released = True
+                break
+        return min(delays) if delays else None
+
+    async def run(self):
+        """Release calls whenever a call is queued, a response returns or a window opens."""
+        while True:
+            delay = self.release()
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def metrics(self, request):  # pylint: disable=W0613
+        """Return the proxy metrics in the Prometheus text format."""
+        now = time.monotonic()
+        lines = []
+        for key in self.keys:
+            lines += [
+                'lightshield_proxy_sent_total{key="%s"} %s' % (key.index, self.sent[key.index]),
+                'lightshield_proxy_usage{key="%s",scope="application"} %s'
+                % (key.index, key.app.usage(now)),
+            ]
+            for method, limit in key.methods.items():
+                lines.append('lightshield_proxy_usage{key="%s",scope="%s"} %s'
+                             % (key.index, method, limit.usage(now)))
+        for (method, status), count in self.responses.items():
+            lines.append('lightshield_proxy_responses_total{method="%s",status="%s"} %s'
+                         % (method, status, count))
+        queued = Counter()
+        for (method, _), queue in self.queues.items():
+            queued[method] += len(queue)
+        for method in queued:
+            lines += [
+                'lightshield_proxy_queued{method="%s"} %s' % (method, queued[method]),
+                'lightshield_proxy_rejected_total{method="%s"} %s'
+                % (method, self.rejected[method]),
+                'lightshield_proxy_wait_seconds_sum{method="%s"} %s'
+                % (method, self.waited[method]),
+                'lightshield_proxy_wait_seconds_count{method="%s"} %s'
+                % (method, self.released[method]),
+            ]
+        return web.Response(text='\n'.join(lines) + '\n')
+
+    def application(self):
+        """Return the web application forwarding all requests."""
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        return app
+
+    def metrics_application(self):
+        """Return the web application serving the metrics."""
+        app = web.Application()
+        app.router.add_get('/metrics', self.metrics)
+        return app
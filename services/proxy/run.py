@@ -0,0 +1,32 @@
+import asyncio
+import os
+
+import uvloop
+from aiohttp import web
+from proxy import Proxy
+
+uvloop.install()
+
+
+async def main():
+    proxy = Proxy(
+        api_keys=os.environ['API_KEY'].split(','),
+        upstream=os.environ.get('UPSTREAM', 'https://%s'),
+        app_limit=os.environ.get('APP_LIMIT', '20:1,100:120'),
+        max_wait=float(os.environ.get('MAX_WAIT', 10)))
+    await proxy.init()
+
+    runner = web.AppRunner(proxy.application())
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', 8000).start()
+    metrics = web.AppRunner(proxy.metrics_application())
+    await metrics.setup()
+    await web.TCPSite(metrics, '0.0.0.0', int(os.environ.get('METRICS_PORT', 8001))).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await proxy.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
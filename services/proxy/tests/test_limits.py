@@ -0,0 +1,54 @@
+# flake8: noqa
+from services.proxy.limits import RateLimit, SlidingWindow, method_key, parse_limits
+
+
+def test_method_key():
+    assert method_key('/lol/match/v4/matchlists/by-account/abc') == 'match-v4/matchlists/by-account'
+    assert method_key('/lol/match/v4/matches/123') == 'match-v4/matches'
+    assert method_key('/lol/league-exp/v4/entries/RANKED_SOLO_5x5/GOLD/I') == 'league-exp-v4/entries'
+
+
+class TestSlidingWindow:
+
+    def test_wait(self):
+        window = SlidingWindow(2, 10)
+        window.add(0)
+        window.add(4)
+        assert window.wait(5) == 5
+        assert window.wait(10) == 0
+        window.add(10)
+        assert window.wait(11) == 3
+
+    def test_sync(self):
+        window = SlidingWindow(5, 10)
+        window.add(0)
+        window.sync(3, 1)
+        assert len(window.sent) == 3
+        window.sync(1, 2)
+        assert len(window.sent) == 3
+
+
+class TestRateLimit:
+
+    def test_all_windows(self):
+        assert parse_limits('20:1,100:120') == [(20, 1), (100, 120)]
+        limit = RateLimit('1:1,2:60')
+        limit.add(0)
+        assert limit.wait(0.5) == 0.5
+        limit.add(1)
+        assert limit.wait(2) == 58
+
+    def test_update_and_block(self):
+        limit = RateLimit('1:1')
+        limit.add(0)
+        limit.update('10:1,50:60', '4:1,20:60', 0.5)
+        assert [len(window.sent) for window in limit.windows] == [4, 20]
+        limit.block(30, 1)
+        assert limit.wait(1) == 30
+
+    def test_margin(self):
+        limit = RateLimit('1:1', margin=0.5)
+        limit.add(0)
+        assert limit.wait(1) == 0.5
+        limit.update(None, '1:1', 1)
+        assert len(limit.windows[0].sent) == 1
@@ -0,0 +1,77 @@
+"""Stand in for the API proxy serving recorded responses, see recorder.py.
+
+Responses are matched to requests by host, path and query. Multiple responses recorded for
+the same url are served in recorded order, the last one is repeated. Responses are held
+back until their recorded time relative to the first recorded request, scaled by the
+replay speed, has passed since the first request received. A speed of 0 replays without delay.
+"""
+import asyncio
+import logging
+from collections import deque
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+
+def url_key(host, path_qs):
+    """Return the key matching a request to its recorded responses."""
+    return host.lower() + path_qs
+
+
+class Replayer:
+    """Serve recorded responses to proxied requests."""
+
+    def __init__(self, records, speed=1.0):
+        """Index the records by url.
+
+        ::param records: Records ordered by time, see recorder.read_records.
+        ::param speed: Replay speed relative to the recording, 0 disables all delays.
+        """
+        self.logging = logging.getLogger("Replayer")
+        self.logging.setLevel(logging.INFO)
+        handler = logging.StreamHandler()
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s [Replayer] %(message)s'))
+        self.logging.addHandler(handler)
+
+        self.speed = speed
+        self.responses = {}
+        for record in records:
+            url = urlsplit(record['url'])
+            path_qs = url.path + ('?' + url.query if url.query else '')
+            self.responses.setdefault(url_key(url.netloc, path_qs), deque()).append(record)
+        self.first = records[0]['time'] if records else 0
+        self.started = None
+        self.served = 0
+        self.unmatched = 0
+
+    async def handle(self, request):
+        """Answer a request with its next recorded response."""
+        loop = asyncio.get_running_loop()
+        if self.started is None:
+            self.started = loop.time()
+        responses = self.responses.get(url_key(request.host, request.path_qs))
+        if not responses:
+            self.unmatched += 1
+            return web.Response(status=404)
+        record = responses.popleft() if len(responses) > 1 else responses[0]
+        if self.speed:
+            due = self.started + (record['time'] - self.first + record['latency']) / self.speed
+            if (delay := due - loop.time()) > 0:
+                await asyncio.sleep(delay)
+        self.served += 1
+        return web.Response(status=record['status'], headers=record['headers'], text=record['body'])
+
+    def application(self):
+        """Return the web application routing all requests to the replayer."""
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        return app
+
+    async def report(self, interval=10):
+        """Periodically log the number of served and unmatched requests."""
+        while True:
+            await asyncio.sleep(interval)
+            self.logging.info("Served %s responses, %s requests unmatched.",
+                              self.served, self.unmatched)
@@ -0,0 +1,24 @@
+import asyncio
+import os
+
+import uvloop
+from aiohttp import web
+from recorder import read_records
+from replayer import Replayer
+
+uvloop.install()
+
+
+async def main():
+    records = read_records(os.environ.get('REPLAY_FILES', 'recordings/*.jsonl.gz'))
+    replayer = Replayer(records, speed=float(os.environ.get('REPLAY_SPEED', 1)))
+    replayer.logging.info("Loaded %s records.", len(records))
+
+    runner = web.AppRunner(replayer.application())
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', 8000).start()
+    await replayer.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
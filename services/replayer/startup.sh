@@ -0,0 +1,3 @@
+#!/usr/bin/env bash
+
+python -u run.py
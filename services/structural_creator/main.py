@@ -3,12 +3,96 @@ import os
 
 import aio_pika
 from aio_pika import ExchangeType
+from sharding import SLOTS, HashRing, queue_name
 
-server = os.environ['SERVER']
+# Comma separated in multi-region mode, see base_image/regions.py
+servers = [server.strip() for server in os.environ['SERVER'].split(',') if server.strip()]
+
+# Priorities 0 (lowest) to MAX_PRIORITY are set by league_rankings and passed on by all stages
+MAX_PRIORITY = 9
+
+# Shards per stage, see base_image/sharding.py
+shards = {stage: int(os.environ.get('SHARDS_%s' % stage, 1))
+          for stage in ('SUMMONER_IDS', 'MATCH_HISTORY', 'MATCH_DETAILS')}
 
 args = {
     'x-overflow': 'reject-publish',
-    'x-max-length': 2000}
+    'x-max-length': 2000,
+    'x-max-priority': MAX_PRIORITY}
+
+
+async def declare_input(channel, name, exchange, count):
+    """Declare the input queue of a stage, one queue per shard if sharded.
+
+    Each shard queue is bound to the slots it owns on the hash ring and unbound from all others,
+    so rerunning with a changed shard count moves only the slots changing owner.
+    """
+    queue = await channel.declare_queue(name=name, durable=True, arguments=args)
+    if count == 1:
+        await queue.bind(exchange, routing_key="#")
+        return
+    # Unbound so the unsharded queue neither duplicates nor blocks tasks once sharded
+    await queue.unbind(exchange, routing_key="#")
+    ring = HashRing(count)
+    for index in range(count):
+        queue = await channel.declare_queue(
+            name=queue_name(name, index), durable=True, arguments=args)
+        owned = ring.slots(index)
+        for slot in map(str, range(SLOTS)):
+            if slot in owned:
+                await queue.bind(exchange, routing_key=slot)
+            else:
+                await queue.unbind(exchange, routing_key=slot)
+
+
+async def declare(channel, server):
+    """Declare the exchanges and queues of a server."""
+    # League Rankings
+    rankings_out = await channel.declare_exchange(
+        name="%s_RANKED" % server,
+        durable=True,
+        type=ExchangeType.TOPIC)
+    await asyncio.sleep(1)
+    # Summoner IDs
+    await declare_input(
+        channel, '%s_RANKED_TO_SUMMONER' % server, rankings_out, shards['SUMMONER_IDS'])
+    summoner_out = await channel.declare_exchange(
+        name="%s_SUMMONER" % server,
+        durable=True,
+        type=ExchangeType.TOPIC)
+    await asyncio.sleep(1)
+
+    # Match History
+    await declare_input(
+        channel, '%s_SUMMONER_TO_HISTORY' % server, summoner_out, shards['MATCH_HISTORY'])
+    history_out = await channel.declare_exchange(
+        name="%s_HISTORY" % server,
+        durable=True,
+        type=ExchangeType.TOPIC)
+    await asyncio.sleep(1)
+
+    # Match Details
+    await declare_input(
+        channel, "%s_HISTORY_TO_DETAILS" % server, history_out, shards['MATCH_DETAILS'])
+    details_out = await channel.declare_exchange(
+        name="%s_DETAILS" % server,
+        durable=True,
+        type=ExchangeType.TOPIC)
+    await asyncio.sleep(1)
+
+    # Processor
+    processor_summoner_in = await channel.declare_queue(
+        name="%s_SUMMONER_TO_PROCESSOR" % server,
+        durable=True,
+        arguments=args
+    )
+    await processor_summoner_in.bind(summoner_out, routing_key="#")
+    processor_details_in = await channel.declare_queue(
+        name="%s_DETAILS_TO_PROCESSOR" % server,
+        durable=True,
+        arguments=args
+    )
+    await processor_details_in.bind(details_out, routing_key="#")
 
 
 async def main(loop):
@@ -19,65 +103,8 @@ async def main(loop):
 
     async with connection:
         channel = await connection.channel()
-
-        # League Rankings
-        rankings_out = await channel.declare_exchange(
-            name="%s_RANKED" % server,
-            durable=True,
-            type=ExchangeType.TOPIC)
-        await asyncio.sleep(1)
-        # Summoner IDs
-        summoner_in = await channel.declare_queue(
-            name='%s_RANKED_TO_SUMMONER' % server,
-            durable=True,
-            arguments=args
-        )
-        await summoner_in.bind(rankings_out, routing_key="#")
-        summoner_out = await channel.declare_exchange(
-            name="%s_SUMMONER" % server,
-            durable=True,
-            type=ExchangeType.TOPIC)
-        await asyncio.sleep(1)
-
-        # Match History
-        history_in = await channel.declare_queue(
-            name='%s_SUMMONER_TO_HISTORY' % server,
-            durable=True,
-            arguments=args
-        )
-        await history_in.bind(summoner_out, routing_key="#")
-        history_out = await channel.declare_exchange(
-            name="%s_HISTORY" % server,
-            durable=True,
-            type=ExchangeType.TOPIC)
-        await asyncio.sleep(1)
-
-        # Match Details
-        details_in = await channel.declare_queue(
-            name="%s_HISTORY_TO_DETAILS" % server,
-            durable=True,
-            arguments=args
-        )
-        await details_in.bind(history_out, routing_key="#")
-        details_out = await channel.declare_exchange(
-            name="%s_DETAILS" % server,
-            durable=True,
-            type=ExchangeType.TOPIC)
-        await asyncio.sleep(1)
-
-        # Processor
-        processor_summoner_in = await channel.declare_queue(
-            name="%s_SUMMONER_TO_PROCESSOR" % server,
-            durable=True,
-            arguments=args
-        )
-        await processor_summoner_in.bind(summoner_out, routing_key="#")
-        processor_details_in = await channel.declare_queue(
-            name="%s_DETAILS_TO_PROCESSOR" % server,
-            durable=True,
-            arguments=args
-        )
-        await processor_details_in.bind(details_out, routing_key="#")
+        for server in servers:
+            await declare(channel, server)
 
 
 if __name__ == "__main__":
@@ -1,22 +1,14 @@
 import asyncio
-import signal
 
 import uvloop
 from logic import Service
+from regions import Shared
 
 uvloop.install()
 
 if __name__ == "__main__":
-    service = Service()
-
-
-    def shutdown_handler():
-        """Shutdown."""
-
-        service.shutdown()
-
-
-    signal.signal(signal.SIGTERM, shutdown_handler)
-
-    asyncio.run(service.run())
-    service.rabbit.shutdown()
+    shared = Shared("SummonerIDs")
+    services = [Service(server, shared) for server in shared.servers]
+    asyncio.run(shared.run(services))
+    for service in services:
+        service.rabbit.shutdown()